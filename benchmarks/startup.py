@@ -0,0 +1,86 @@
+"""
+Measure how long distest takes to start, each case in a fresh interpreter so nothing is cached in ``sys.modules``.
+
+Run from the root of the repository::
+
+    python benchmarks/startup.py [--runs 20] [--importtime]
+
+``--importtime`` also prints the modules that take the longest to import in each case, from ``python -X importtime``.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: A small suite, declared like a real one. It doesn't use discord.py itself, so only distest's own imports count.
+SUITE = """
+from distest import TestCollector, run_dtest_bot
+
+test_collector = TestCollector()
+
+@test_collector.fixture(scope="session")
+async def greeting(interface):
+    return "hello"
+
+for i in range(100):
+    async def test(interface, greeting):
+        await interface.assert_reply_equals(greeting, greeting)
+    test_collector(name="test_{}".format(i), tags=["generated"])(test)
+"""
+
+#: What is timed: a name, and the arguments to give the interpreter
+CASES = [
+    ("python", ["-c", "pass"]),
+    ("import distest", ["-c", "import distest"]),
+    ("collect tests", ["-c", SUITE]),
+    ("run_dtest_bot --help", ["-c", SUITE + "run_dtest_bot(['suite', '--help'], test_collector)"]),
+    ("import distest.bot", ["-c", "import distest.bot"]),
+]
+
+
+def time_case(args, runs):
+    """ Run the interpreter with ``args`` ``runs`` times, and return how long each run took, in seconds """
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def slowest_imports(args, count=5):
+    """ The ``count`` modules with the highest cumulative import time when running ``args`` """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="How many times to run each case. Default is 20.")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports of each case.")
+    args = parser.parse_args()
+
+    print("{:>22} {:>9} {:>9}".format("case", "min ms", "median ms"))
+    for name, case_args in CASES:
+        times = time_case(case_args, args.runs)
+        print("{:>22} {:>9.1f} {:>9.1f}".format(name, min(times) * 1000, statistics.median(times) * 1000))
+        if args.importtime:
+            for microseconds, module in slowest_imports(case_args):
+                print("{:>22} {:>9.1f}   {}".format("", microseconds / 1000, module))
+
+
+if __name__ == "__main__":
+    main()
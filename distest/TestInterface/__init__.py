@@ -1,6 +1,4 @@
 import enum
-import discord
-from typing import Optional
 
 
 class TestResult(enum.Enum):
@@ -9,9 +7,11 @@ class TestResult(enum.Enum):
     UNRUN = 0
     SUCCESS = 1
     FAILED = 2
+    SKIPPED = 3
+    ERROR = 4
 
 
-SPECIAL_TEST_NAMES = {"all", "unrun", "failed"}
+SPECIAL_TEST_NAMES = {"all", "unrun", "failed", "changed"}
 
 
 class Test:
@@ -20,90 +20,41 @@ class Test:
     :param str name: The name of the test, checks this against the valid test names
     :param function func: The function in the tester bot that makes up this test
     :param bool needs_human: Weather or not this test will require human interaction to complete
+    :param bool serial: If true, this test can't be isolated to its own channel (it watches guild-wide events, another
+                        channel, etc.), so it is never run alongside other tests when running in parallel
+    :param tags: Labels the test can be selected by
+    :type tags: Iterable[str]
+    :param depends_on: The names of the tests that have to pass before this one can run
+    :type depends_on: Iterable[str]
+    :param float deadline: How many seconds the whole test may take before it is cancelled, overriding the run's
+                           deadline
     :raises: ValueError
     """
 
-    def __init__(self, name, func, needs_human=False):
+    def __init__(self, name, func, needs_human=False, serial=False, tags=(), depends_on=(), deadline=None):
         if name in SPECIAL_TEST_NAMES:
             raise ValueError("{} is not a valid test name".format(name))
         self.name = name
         self.func = func
         self.last_run = 0
+        self.duration = None
+        self.timings = []
+        self.error = None
         self.result = TestResult.UNRUN
         self.needs_human = needs_human
-
-
-class TestInterface:
-    """ All the tests, and some supporting functions. Tests are designed to be run
-    by the tester and mixed together in order to actually test the bot.
-
-    .. note::
-        In addition to the tests failing due to their own reasons, all tests will also fail if they timeout.
-        This period is specified when the bot is run.
-
-    .. note::
-        Some functions (``send_message`` and ``edit_message``) are helper functions rather than tests and serve to bring
-        some of the functionality of the discord library onto the same level as the tests.
-
-    .. note::
-        ``assert_reply_*`` tests will send a message with the passed content, while ``assert_message_*`` tests require a
-        ``Message`` to be passed to them. This allows for more flexibility when you need it and an easier
-        option when you don't.
-
-    :param DiscordCliInterface client: The discord client of the tester.
-    :param discord.TextChannel channel: The discord channel in which to run the tests.
-    :param discord.Member target: The bot we're testing.
-    """
-
-    def __init__(self, client, channel, target):
-        self.client = client
-        self.channel: discord.TextChannel = channel
-        self.target: discord.Member = target
-        self.voice_client: Optional[discord.VoiceClient] = None
-        self.voice_channel: Optional[discord.VoiceChannel] = None
-
-    # Imported Methods
-    from ._helpers import send_message, _check_message, edit_message
-    from ._voice import connect, disconnect
-    from ._oddballs import ask_human, ensure_silence
-    from ._reaction import assert_reaction_equals
-    from ._message import (
-        assert_message_equals,
-        assert_message_contains,
-        assert_message_has_image,
-        assert_message_matches,
-    )
-    from ._reply import (
-        assert_reply_equals,
-        assert_reply_contains,
-        assert_reply_embed_equals,
-        assert_reply_embed_regex,
-        assert_reply_matches,
-        assert_reply_has_image,
-        get_delayed_reply,
-    )
-    from ._embeds import (
-        assert_embed_equals,
-        assert_embed_regex,
-    )
-    from ._wait_for import (
-        wait_for_message,
-        wait_for_reaction,
-        wait_for_reply,
-        wait_for_event,
-        wait_for_message_in_channel,
-    )
-    from ._guild_channel import (
-        assert_guild_channel_created,
-        assert_guild_channel_deleted,
-        # assert_guild_channel_pin_content_equals,
-        # assert_guild_channel_unpin_content_equals,
-    )
-
-    edit_message = staticmethod(edit_message)
-    assert_message_equals = staticmethod(assert_message_equals)
-    assert_message_contains = staticmethod(assert_message_contains)
-    assert_message_has_image = staticmethod(assert_message_has_image)
-    assert_message_matches = staticmethod(assert_message_matches)
-    assert_embed_equals = staticmethod(assert_embed_equals)
-    assert_embed_regex = staticmethod(assert_embed_regex)
\ No newline at end of file
+        self.serial = serial
+        self.tags = frozenset(tags)
+        self.depends_on = tuple(depends_on)
+        self.deadline = deadline
+        if name in self.depends_on:
+            raise ValueError("{} can't depend on itself".format(name))
+
+
+def __getattr__(name):
+    # The interface pulls in discord.py and every assertion, so it is only imported once something asks for it
+    if name == "TestInterface":
+        from ._interface import TestInterface
+
+        globals()[name] = TestInterface
+        return TestInterface
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
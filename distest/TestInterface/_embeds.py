@@ -1,9 +1,67 @@
 from discord import Message, Embed
-from typing import Dict
-
-from distest.exceptions import ResponseDidNotMatchError
-
-import re
+from typing import Dict, Pattern, Union
+
+from distest.exceptions import EmbedMismatchError
+from distest.patterns import pattern_cache
+
+#: The keys of a flattened embed, see :py:func:`flatten_embed`. ``author``, ``footer``, ``image``, ``thumbnail`` and
+#: ``video`` stand for the author's name, the footer's text and the media URLs.
+EMBED_KEYS = (
+    "title",
+    "description",
+    "url",
+    "color",
+    "timestamp",
+    "author",
+    "author.url",
+    "author.icon_url",
+    "footer",
+    "footer.icon_url",
+    "image",
+    "thumbnail",
+    "video",
+    "fields",
+)
+
+#: The keys ``assert_embed_equals`` compares when no attributes are given, the ones it has always compared
+DEFAULT_EMBED_KEYS = ("title", "description", "url", "color", "author", "video", "image", "thumbnail")
+
+
+def flatten_embed(embed: Embed) -> dict:
+    """ Normalize an embed to a flat dict with every key of :py:data:`EMBED_KEYS`, so it can be compared with another
+    one key by key. Missing values are ``None``, the color is an int, the timestamp an ISO 8601 string and the fields
+    a list of ``(name, value, inline)`` tuples.
+
+    :param discord.Embed embed: The embed
+    :rtype: dict
+    """
+    data = embed.to_dict()
+    author = data.get("author", {})
+    footer = data.get("footer", {})
+    return {
+        "title": data.get("title"),
+        "description": data.get("description"),
+        "url": data.get("url"),
+        "color": data.get("color"),
+        "timestamp": data.get("timestamp"),
+        "author": author.get("name"),
+        "author.url": author.get("url"),
+        "author.icon_url": author.get("icon_url"),
+        "footer": footer.get("text"),
+        "footer.icon_url": footer.get("icon_url"),
+        "image": data.get("image", {}).get("url"),
+        "thumbnail": data.get("thumbnail", {}).get("url"),
+        "video": data.get("video", {}).get("url"),
+        "fields": [
+            (field.get("name"), field.get("value"), field.get("inline", False)) for field in data.get("fields", [])
+        ],
+    }
+
+
+def _check_keys(keys):
+    for key in keys:
+        if key not in EMBED_KEYS:
+            raise NotImplementedError('"' + key + '" is not a possible value.')
 
 
 async def assert_embed_equals(
@@ -11,100 +69,61 @@ async def assert_embed_equals(
 ):
     """If ``matches`` doesn't match the embed of ``message``, fail the test.
 
-    Checks only the attributes from ``attributes_to_prove``.
+    Checks only the attributes from ``attributes_to_prove``. Every embed of the message is compared, and every
+    difference is listed in the :py:attr:`diff <distest.exceptions.EmbedMismatchError.diff>` of the error, not just the
+    first one.
 
     :param message: original message
     :param matches: :py:class:`embed <discord.Embed>` object to compare to
     :param attributes_to_prove: a string list with the attributes of the embed, which are to compare
-        This are all the Attributes you can prove: "title", "description", "url", "color",
-        "author", "video", "image" and "thumbnail".
+        This are all the Attributes you can prove: "title", "description", "url", "color", "timestamp",
+        "author", "author.url", "author.icon_url", "footer", "footer.icon_url", "image", "thumbnail", "video" and
+        "fields". Defaults to "title", "description", "url", "color", "author", "video", "image" and "thumbnail".
     :return: message
     :rtype: discord.Message
+    :raises: EmbedMismatchError
     """
-
-    # All possible attributes a user can set during initialisation
-    possible_attributes = [
-        "title",
-        "description",
-        "url",
-        "color",
-        "author",  # This is not the original author of the message, author is a attribute you are able to set.
-        "video",
-        "image",
-        "thumbnail",
-    ]
-    # View all (visible) attributes visualized here: https://imgur.com/a/tD7Ibc4
-
-    attributes = []
-
-    # Proves, if the attribute provided by the user is a valid attribute to check
-    if attributes_to_prove is not None:
-        for value in attributes_to_prove:
-            if value not in possible_attributes:
-                raise NotImplementedError('"' + value + '" is not a possible value.')
-            attributes.append(value)
-    else:
-        # If no attributes to check are provided, check them all.
-        attributes = possible_attributes
-
-    for embed in message.embeds:
-        for attribute in attributes:
-            if attribute == "image" or attribute == "thumbnail":
-                # Comparison of Embedded Images / Thumbnails
-                if getattr(getattr(embed, attribute), "url") != getattr(
-                    getattr(matches, attribute), "url"
-                ):
-                    raise ResponseDidNotMatchError(
-                        "The {} attribute did't match".format(attribute)
-                    )
-            elif attribute == "video":
-                # Comparison of Embedded Video
-                if getattr(getattr(embed, "video"), "url") != getattr(
-                    getattr(matches, "video"), "url"
-                ):
-                    raise ResponseDidNotMatchError("The video attribute did't match")
-            elif attribute == "author":
-                # Comparison of Author
-                if getattr(getattr(embed, "author"), "name") != getattr(
-                    getattr(matches, "author"), "name"
-                ):
-                    raise ResponseDidNotMatchError("The author attribute did't match")
-            elif not getattr(embed, attribute) == getattr(matches, attribute):
-                print(
-                    "Did not match:",
-                    attribute,
-                    getattr(embed, attribute),
-                    getattr(matches, attribute),
-                )
-                raise ResponseDidNotMatchError
+    keys = DEFAULT_EMBED_KEYS if attributes_to_prove is None else attributes_to_prove
+    _check_keys(keys)
+    if not message.embeds:
+        raise EmbedMismatchError([(None, "embed", "an embed", None)])
+
+    expected = flatten_embed(matches)
+    diff = []
+    for index, embed in enumerate(message.embeds):
+        actual = flatten_embed(embed)
+        diff += [(index, key, expected[key], actual[key]) for key in keys if actual[key] != expected[key]]
+    if diff:
+        raise EmbedMismatchError(diff)
     return message
 
 
-async def assert_embed_regex(message: Message, patterns: Dict[str, str]):
+async def assert_embed_regex(message: Message, patterns: Dict[str, Union[str, Pattern]]):
     """If regex patterns ``patterns`` cannot be found in the embed of ``message``, fail the test.
 
-    Checks only the attributes from the dictionary keys of ``patterns``.
+    Checks only the attributes from the dictionary keys of ``patterns``, which can be any of the keys
+    :py:func:`assert_embed_equals` takes, other than "fields". The values can be strings, which are compiled once and
+    kept in the :py:data:`pattern_cache <distest.patterns.pattern_cache>`, or patterns compiled with
+    :py:func:`re.compile`.
 
     :param message: original message
     :param patterns: a dict with keys of the attributes and regex values.
     :return: message
     :rtype: discord.Message
+    :raises: EmbedMismatchError
     """
-
-    possible_attributes = [
-        "title",
-        "description",
-        "color",
-    ]
-
-    for embed in message.embeds:
-        for attribute, regex in patterns.items():
-            if not re.search(regex, getattr(embed, attribute)):
-                print(
-                    "Regex did not match:",
-                    attribute,
-                    getattr(embed, attribute),
-                    regex,
-                )
-                raise ResponseDidNotMatchError
+    _check_keys(patterns)
+    if not message.embeds:
+        raise EmbedMismatchError([(None, "embed", "an embed", None)])
+
+    compiled = {attribute: pattern_cache.compile(regex) for attribute, regex in patterns.items()}
+    diff = []
+    for index, embed in enumerate(message.embeds):
+        actual = flatten_embed(embed)
+        for attribute, regex in compiled.items():
+            value = actual[attribute]
+            if value is None or not regex.search(str(value)):
+                diff.append((index, attribute, regex.pattern, value))
+    if diff:
+        raise EmbedMismatchError(diff)
     return message
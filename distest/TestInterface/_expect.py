@@ -0,0 +1,165 @@
+from distest.exceptions import ExpectationsNotMetError, TestRequirementFailure
+from distest.timing import records_completion
+
+try:
+    from asyncio.exceptions import TimeoutError
+except (ImportError, ModuleNotFoundError):
+    from concurrent.futures._base import TimeoutError
+
+#: How many seconds to give Discord to add the embed of a link in the reply, for :py:meth:`ReplyExpectation.has_image`
+EMBED_DELAY = 1
+
+
+class ReplyExpectation:
+    """ A batch of checks on the reply to a single trigger message, made with
+    :py:meth:`expect_reply <distest.TestInterface.TestInterface.expect_reply>`.
+
+    Each check method adds a check and returns the expectation, so they can be chained. Nothing is sent until the
+    expectation is awaited (or :py:meth:`check` is called), which sends the trigger once, waits for the reply once and
+    runs every check on it. All the checks that fail are reported together in one
+    :py:exc:`ExpectationsNotMetError <distest.exceptions.ExpectationsNotMetError>`.
+
+    .. code-block:: python
+
+        reply = await interface.expect_reply("!info").contains("Version").matches(r".*\\d+\\.\\d+").has_image()
+
+    :param TestInterface interface: The interface of the test
+    :param str contents: The content of the trigger message
+    """
+
+    def __init__(self, interface, contents):
+        self._interface = interface
+        self._contents = contents
+        self._checks = []
+        self._reactions = []
+        self._wants_image = False
+
+    @property
+    def timings(self):
+        """ The timings of the test, so :py:func:`records_completion <distest.timing.records_completion>` can mark the
+        wait as completed once every check has run """
+        return self._interface.timings
+
+    def _add(self, description, check, *args):
+        self._checks.append((description, check, args))
+        return self
+
+    def equals(self, matches):
+        """ Expect the content of the reply to be exactly ``matches``, see :py:meth:`assert_message_equals
+        <distest.TestInterface.TestInterface.assert_message_equals>` """
+        return self._add("content equals {!r}".format(matches), self._interface.assert_message_equals, matches)
+
+    def contains(self, substring):
+        """ Expect the content of the reply to contain ``substring``, see :py:meth:`assert_message_contains
+        <distest.TestInterface.TestInterface.assert_message_contains>` """
+        return self._add("content contains {!r}".format(substring), self._interface.assert_message_contains, substring)
+
+    def matches(self, regex):
+        """ Expect the content of the reply to match ``regex``, see :py:meth:`assert_message_matches
+        <distest.TestInterface.TestInterface.assert_message_matches>` """
+        pattern = getattr(regex, "pattern", regex)
+        return self._add("content matches {!r}".format(pattern), self._interface.assert_message_matches, regex)
+
+    def embed_equals(self, matches, attributes_to_prove=None):
+        """ Expect the embed of the reply to equal ``matches``, see :py:meth:`assert_embed_equals
+        <distest.TestInterface.TestInterface.assert_embed_equals>` """
+        return self._add(
+            "embed equals", self._interface.assert_embed_equals, matches, attributes_to_prove
+        )
+
+    def embed_regex(self, patterns):
+        """ Expect the embed of the reply to match ``patterns``, see :py:meth:`assert_embed_regex
+        <distest.TestInterface.TestInterface.assert_embed_regex>` """
+        return self._add("embed matches {!r}".format(patterns), self._interface.assert_embed_regex, patterns)
+
+    def has_image(self):
+        """ Expect the reply to have an attachment or embed, see :py:meth:`assert_message_has_image
+        <distest.TestInterface.TestInterface.assert_message_has_image>`. Discord adds the embed of a link later, with
+        an edit, so a reply without one is given :py:data:`EMBED_DELAY` seconds to get it. """
+        self._wants_image = True
+        return self._add("has an image", self._interface.assert_message_has_image)
+
+    def reaction(self, emoji):
+        """ Expect the target to react to the trigger message with ``emoji``, like :py:meth:`assert_reaction_equals
+        <distest.TestInterface.TestInterface.assert_reaction_equals>` """
+        self._reactions.append(str(emoji))
+        return self
+
+    async def _collect_reactions(self, reactions, trigger):
+        """ Wait for the expected reactions on ``trigger``, returning the ones that never came """
+        missing = list(self._reactions)
+        timeout = self._interface._timeout_for("wait_for_reaction")
+        while missing:
+            try:
+                _, (reaction, _), _ = await reactions.get(timeout=timeout)
+            except TimeoutError:
+                break
+            if reaction.message.id == trigger.id and str(reaction.emoji) in missing:
+                missing.remove(str(reaction.emoji))
+        return missing
+
+    async def _wait_for_embed(self, reply):
+        """ Wait for Discord to edit the embed of a link into ``reply``, returning the reply as it is after the edit, or
+        as it was if that doesn't happen in time """
+        interface = self._interface
+        try:
+            # Edits are buffered like messages, so one made before this started waiting is still found
+            _, (_, after) = await interface.client.router.wait_for_next(
+                "message_edit",
+                interface._trigger_seq,
+                interface.channel.id,
+                message_id=reply.id,
+                check=lambda before, after: bool(after.embeds),
+                timeout=EMBED_DELAY,
+            )
+        except TimeoutError:
+            return reply
+        return after
+
+    @records_completion
+    async def check(self):
+        """ Send the trigger, wait for the reply and run every check on it.
+
+        :returns: The reply.
+        :rtype: discord.Message
+        :raises: NoResponseError, ExpectationsNotMetError
+        """
+        interface = self._interface
+        timing = interface._start_timing("wait_for_reply")
+        # Subscribe before sending, the target may react before it replies
+        with interface.client.router.subscribe(
+            "reaction_add", channel_id=interface.channel.id, author_id=interface.target.id
+        ) as reactions:
+            trigger = await interface._send(self._contents, timing)
+            timing.mark_sent()
+            reply = await interface._wait_for(
+                timing, "message", channel_id=interface.channel.id, author_id=interface.target.id
+            )
+            missing = await self._collect_reactions(reactions, trigger) if self._reactions else []
+        if self._wants_image and not reply.attachments and not reply.embeds:
+            reply = await self._wait_for_embed(reply)
+
+        failures = []
+        for description, check, args in self._checks:
+            try:
+                await check(reply, *args)
+            except TestRequirementFailure as error:
+                failures.append("{}: {}".format(description, str(error) or type(error).__name__))
+        failures += ["reaction {} was not added".format(emoji) for emoji in missing]
+        if failures:
+            raise ExpectationsNotMetError(failures)
+        return reply
+
+    def __await__(self):
+        return self.check().__await__()
+
+
+def expect_reply(self, contents):
+    """ Batch up several checks on the reply to ``contents``, which is only sent once. See
+    :py:class:`ReplyExpectation <distest.TestInterface._expect.ReplyExpectation>`.
+
+    :param str contents: The content of the trigger message. (A command)
+    :returns: An expectation to add checks to and then await.
+    :rtype: ReplyExpectation
+    """
+    return ReplyExpectation(self, contents)
@@ -1,8 +1,10 @@
 from discord.abc import GuildChannel
 from discord import TextChannel
 from distest.exceptions import ResponseDidNotMatchError
+from distest.timing import records_completion
 
 
+@records_completion
 async def assert_guild_channel_created(self, channel_name, timeout=None):
     """ Assert that the next channel created matches the name given
 
@@ -21,6 +23,7 @@ async def assert_guild_channel_created(self, channel_name, timeout=None):
     )
 
 
+@records_completion
 async def assert_guild_channel_deleted(self, channel_name, timeout=None):
     """ Assert that the next channel deleted matches the name given
 
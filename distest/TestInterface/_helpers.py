@@ -1,3 +1,9 @@
+from asyncio import get_event_loop
+
+from distest.exceptions import NoResponseError
+from distest.timing import AssertionTiming
+
+
 async def send_message(self, content):
     """ Send a message to the channel the test is being run in. **Helper Function**
 
@@ -5,7 +11,69 @@ async def send_message(self, content):
     :returns: The message that was sent
     :rtype: discord.Message
     """
-    return await self.channel.send(content)
+    timing = self._start_timing("send_message")
+    message = await self._send(content, timing)
+    timing.mark_event()  # For a send, the event is Discord's response
+    timing.mark_completed()
+    return message
+
+
+async def _send(self, content, timing=None, channel=None):
+    """ Send a message through the client's send scheduler, if it has one, so it waits its turn instead of running
+    into a rate limit. The time it was held back for is added to ``timing.throttled``. Marks the message as the
+    trigger that the following waits look for events after, and records its ID as ``timing.trigger_id``.
+
+    :param str content: Text to send in the message
+    :param AssertionTiming timing: The timing of the assertion that is sending
+    :param discord.abc.Messageable channel: Where to send it, defaults to the channel the test is being run in
+    :rtype: discord.Message
+    """
+    channel = channel or self.channel
+    scheduler = self.client.send_scheduler
+    if scheduler is not None:
+        throttled = await scheduler.acquire(channel.id)
+        if timing is not None:
+            timing.throttled += throttled
+    # Waits after this look at everything from here on, even what arrives before they start
+    self._trigger_seq = self.client.router.seq
+    self._trigger_time = get_event_loop().time()
+    message = await channel.send(content)
+    if timing is not None:
+        timing.trigger_id = message.id
+    return message
+
+
+def _since(self, event, channel_id):
+    """ The sequence number in the client's event buffer that the next wait for ``event`` in ``channel_id`` should look
+    after: the last trigger sent, or the last such event a wait returned if that came later. Sequence numbers are
+    shared by every channel, so what was consumed is kept per channel. """
+    return max(self._trigger_seq, self._consumed_seq.get((event, channel_id), 0))
+
+
+def _start_timing(self, kind):
+    """ Start timing a send or wait, the timing is kept in ``self.timings`` """
+    timing = AssertionTiming(kind)
+    self.timings.append(timing)
+    return timing
+
+
+def _timeout_for(self, kind):
+    """ The timeout for a wait of type ``kind``, learned from previous runs if the client has a latency history """
+    history = self.client.latency_history
+    if history is None or self.test is None:
+        return self.client.timeout
+    if kind == "ensure_silence":
+        return history.silence_timeout(self.test.name, self.client.timeout)
+    return history.timeout_for(self.test.name, kind, self.client.timeout)
+
+
+def _no_response(self, started, extensions=0):
+    """ The :py:exc:`NoResponseError` for a wait that started at loop time ``started`` and got nothing, with a
+    report of the tester's health during it if the client has a health monitor """
+    health = self.client.health
+    if health is None:
+        return NoResponseError()
+    return NoResponseError(health=health.report(started, get_event_loop().time(), extensions))
 
 
 def _check_message(self, message):
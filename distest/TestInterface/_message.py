@@ -1,5 +1,5 @@
 from distest.exceptions import ResponseDidNotMatchError, UnexpectedResponseError
-from re import match
+from distest.patterns import pattern_cache
 
 
 async def assert_message_equals(message, matches):
@@ -33,16 +33,18 @@ async def assert_message_contains(message, substring):
 async def assert_message_matches(message, regex):
     """ If `message` does not match a regex, fail the test.
 
-    Requires a properly formatted Python regex ready to be used in the ``re`` functions.
-
+    Requires a properly formatted Python regex ready to be used in the ``re`` functions, or a pattern compiled with
+    :py:func:`re.compile`. Patterns given as strings are compiled once and kept in the
+    :py:data:`pattern_cache <distest.patterns.pattern_cache>`.
 
     :param discord.Message message: The message to test.
-    :param str regex: The regular expression to test `message` against.
+    :param regex: The regular expression to test `message` against.
+    :type regex: Union[str, re.Pattern]
     :returns: `message`
     :rtype: discord.Message
     :raises: ResponseDidNotMatchError
     """
-    if not match(regex, message.content):
+    if not pattern_cache.compile(regex).match(message.content):
         raise ResponseDidNotMatchError
     return message
 
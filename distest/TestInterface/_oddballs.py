@@ -1,3 +1,5 @@
+from asyncio import get_event_loop
+
 from discord import Reaction
 from distest.exceptions import (
     UnexpectedResponseError,
@@ -13,14 +15,67 @@ except (ImportError, ModuleNotFoundError):
     from concurrent.futures._base import CancelledError
 
 
-async def ensure_silence(self):
+async def ensure_silence(self, quiescence=None, sentinel=None, sentinel_reply=None):
     """ Assert that the bot does not post any messages for some number of seconds.
 
-    :raises: UnexpectedResponseError, TimeoutError
+    By default the number of seconds is the timeout, or if adaptive timeouts are on, a bit longer than the target has
+    ever taken to reply before. There are two faster ways of deciding the target is done:
+
+    * ``quiescence``: pass as soon as the target has done nothing at all in the channel, not even typing, for this
+      many seconds. Typing starts the window again. Never waits longer than the default would.
+    * ``sentinel``: send ``sentinel``, a message the target is known to answer with ``sentinel_reply``, and pass as
+      soon as that answer arrives with no other message from the target before it.
+
+    :param float quiescence: The number of seconds without any activity from the target after which it is silent
+    :param str sentinel: A message to send that the target will answer with ``sentinel_reply``
+    :param str sentinel_reply: The content of the target's answer to ``sentinel``, required with ``sentinel``
+    :raises: UnexpectedResponseError, NoResponseError, TimeoutError
     """
+    router = self.client.router
+    # Anything the target said since the last trigger, before this was even called, already breaks the silence
+    if router.find("message", self._since("message", self.channel.id), self.channel.id, self.target.id) is not None:
+        raise UnexpectedResponseError
+
+    if sentinel is not None:
+        if sentinel_reply is None:
+            raise ValueError("sentinel_reply is needed to know when the target has answered the sentinel")
+        with router.subscribe(
+            "message", channel_id=self.channel.id, author_id=self.target.id
+        ) as replies:
+            await self._send(sentinel)
+            started = get_event_loop().time()
+            try:
+                _, message, seq = await replies.get(timeout=self.client.timeout)
+            except TimeoutError:
+                raise self._no_response(started)
+            # So later waits don't find the sentinel's answer in the buffer again
+            self._consumed_seq["message", self.channel.id] = seq
+        if message.content != sentinel_reply:
+            raise UnexpectedResponseError
+        return
+
+    timeout = self._timeout_for("ensure_silence")
+    if quiescence is not None:
+        loop = get_event_loop()
+        deadline = loop.time() + timeout
+        with router.subscribe(
+            "message", "typing", channel_id=self.channel.id, author_id=self.target.id
+        ) as activity:
+            while deadline > loop.time():
+                try:
+                    event, _, _ = await activity.get(timeout=min(quiescence, deadline - loop.time()))
+                except TimeoutError:
+                    return
+                if event == "message":
+                    raise UnexpectedResponseError
+        return
+
     try:
-        await self.client.wait_for(
-            "message", timeout=self.client.timeout, check=self._check_message
+        await router.wait_for(
+            "message",
+            channel_id=self.channel.id,
+            author_id=self.target.id,
+            timeout=timeout,
         )
     except (TimeoutError, TimeoutError, CancelledError):
         pass
@@ -47,8 +102,8 @@ async def ask_human(self, query):
             return human_reaction.message
 
     try:
-        reaction: Reaction = await self.client.wait_for(
-            "reaction_add", timeout=self.client.timeout, check=check
+        reaction: Reaction = await self.client.router.wait_for(
+            "reaction_add", message_id=message.id, timeout=self.client.timeout, check=check
         )
     except TimeoutError:
         raise HumanResponseTimeout
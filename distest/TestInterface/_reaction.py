@@ -1,6 +1,8 @@
 from distest.exceptions import ReactionDidNotMatchError
+from distest.timing import records_completion
 
 
+@records_completion
 async def assert_reaction_equals(self, contents, emoji):
     """ Send a message and ensure that the reaction is equal to `emoji`. If not, fail the test.
 
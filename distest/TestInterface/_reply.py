@@ -1,10 +1,12 @@
-from asyncio import sleep
+from asyncio import get_event_loop, sleep
 from inspect import signature, _ParameterKind
-from typing import Dict
+from typing import Dict, Pattern, Union
 
 from discord import Embed, Message
+from distest.timing import records_completion
 
 
+@records_completion
 async def assert_reply_equals(self, contents, matches):
     """ Send a message and wait for a response. If the response does not match the string
     exactly, fail the test.
@@ -19,6 +21,7 @@ async def assert_reply_equals(self, contents, matches):
     return await self.assert_message_equals(response, matches)
 
 
+@records_completion
 async def assert_reply_contains(self, contents, substring):
     """ Send a message and wait for a response. If the response does not contain
     the given substring, fail the test.
@@ -33,6 +36,7 @@ async def assert_reply_contains(self, contents, substring):
     return await self.assert_message_contains(response, substring)
 
 
+@records_completion
 async def assert_reply_embed_equals(
         self, message: str, equals: Embed, attributes_to_check: list = None
 ):
@@ -43,9 +47,8 @@ async def assert_reply_embed_equals(
 
     :param message:
     :param equals: :py:class:`embed <discord.Embed>` object to compare to
-    :param attributes_to_check: a string list with the attributes of the embed, which are to compare
-        This are all the Attributes you can prove: "title", "description", "url", "color",
-        "author", "video", "image" and "thumbnail".
+    :param attributes_to_check: a string list with the attributes of the embed, which are to compare. See
+        :py:meth:`assert_embed_equals <distest.TestInterface.assert_embed_equals>` for the ones you can prove.
     :return: message
     :rtype: discord.Message
     """
@@ -55,7 +58,8 @@ async def assert_reply_embed_equals(
     )
 
 
-async def assert_reply_embed_regex(self, message: str, patterns: Dict[str, str]):
+@records_completion
+async def assert_reply_embed_regex(self, message: str, patterns: Dict[str, Union[str, Pattern]]):
     """ Send a message and wait for a response. If the response is not an embed or does not match the regex,
         fail the test.
 
@@ -71,13 +75,15 @@ async def assert_reply_embed_regex(self, message: str, patterns: Dict[str, str])
     return await self.assert_embed_regex(response, patterns)
 
 
+@records_completion
 async def assert_reply_matches(self, contents: str, regex):
     """ Send a message and wait for a response. If the response does not match a regex, fail the test.
 
-    Requires a properly formatted Python regex ready to be used in the ``re`` functions.
+    Requires a properly formatted Python regex ready to be used in the ``re`` functions, or a compiled pattern.
 
     :param str contents: The content of the trigger message. (A command)
-    :param str regex: The regular expression to test against.
+    :param regex: The regular expression to test against.
+    :type regex: Union[str, re.Pattern]
     :returns: The reply.
     :rtype: discord.Message
     :raises: ResponseDidNotMatchError
@@ -86,6 +92,7 @@ async def assert_reply_matches(self, contents: str, regex):
     return await self.assert_message_matches(response, regex)
 
 
+@records_completion
 async def assert_reply_has_image(self, contents):
     """Send a message consisting of `contents` and wait for a reply.
 
@@ -104,6 +111,9 @@ async def assert_reply_has_image(self, contents):
 async def get_delayed_reply(self, seconds_to_wait, test_function, *args):
     """Get the last reply after a specific time and check it against a given test.
 
+    The time is counted from when the last trigger message was sent, and the reply is the target's newest message in
+    the channel since then.
+
     :param float seconds_to_wait: Time to wait in s
     :param method test_function: The function to call afterwards, without parenthesis
         (assert_message_equals, not assert_message_equals()!)
@@ -136,6 +146,10 @@ async def get_delayed_reply(self, seconds_to_wait, test_function, *args):
     if len(args) != num_desired_parameters:
         raise SyntaxError("Invalid Number of Arguments")
 
-    await sleep(seconds_to_wait)
-    message: Message = self.channel.last_message
+    # Only sleep for what's left of the wait since the trigger was sent
+    await sleep(max(0.0, seconds_to_wait - (get_event_loop().time() - self._trigger_time)))
+    found = self.client.router.find(
+        "message", self._trigger_seq, self.channel.id, self.target.id, last=True
+    )
+    message: Message = found[1] if found is not None else self.channel.last_message
     return await test_function(message, *args)
@@ -1,11 +1,57 @@
-from distest.exceptions import NoResponseError
+from asyncio import get_event_loop
+
 from typing import Callable, Optional
+
+from distest.timing import records_completion
+
 try:
     from asyncio.exceptions import TimeoutError
 except (ImportError, ModuleNotFoundError):
     from concurrent.futures._base import TimeoutError
 
 
+async def _wait_for(self, timing, event, timeout=None, **keys):
+    """ Wait for an event through the client's router, recording when it arrives on ``timing``.
+
+    Waits in a channel start with the router's buffer of that channel, so an event that arrived after the last
+    trigger was sent is found even if it came before the wait started. If the wait times out while the client's
+    health monitor saw the tester stall, and the monitor has ``retries`` left, it is extended by as long as the stall
+    lasted.
+
+    :raises: NoResponseError
+    """
+    if timeout is None:
+        timeout = self._timeout_for(timing.kind)
+
+    router = self.client.router
+    health = self.client.health
+    loop = get_event_loop()
+    started = window = loop.time()
+    extensions = 0
+    while True:
+        try:
+            if keys.get("channel_id") is not None:
+                since = self._since(event, keys["channel_id"])
+                seq, result = await router.wait_for_next(event, since, timeout=timeout, **keys)
+                if seq is not None:
+                    self._consumed_seq[event, keys["channel_id"]] = seq
+            else:
+                result = await router.wait_for(event, timeout=timeout, **keys)
+        except TimeoutError:
+            if health is None or extensions >= health.retries:
+                raise self._no_response(started, extensions)
+            now = loop.time()
+            timeout = health.extension(window, now, timeout)
+            if not timeout:
+                raise self._no_response(started, extensions)
+            window = now
+            extensions += 1
+            health.extended += 1
+        else:
+            timing.mark_event()
+            return result
+
+@records_completion
 async def wait_for_reaction(self, message):
     """ Assert that ``message`` is reacted to with any reaction.
 
@@ -14,24 +60,16 @@ async def wait_for_reaction(self, message):
     :rtype: discord.Reaction
     :raises NoReactionError:
     """
-
-    def check_reaction(reaction, user):
-        return (
-            reaction.message.id == message.id
-            and user == self.target
-            and reaction.message.channel == self.channel
-        )
-
-    try:
-        result = await self.client.wait_for(
-            "reaction_add", timeout=self.client.timeout, check=check_reaction
-        )
-    except TimeoutError:
-        raise NoResponseError
-    else:
-        return result
+    return await self._wait_for(
+        self._start_timing("wait_for_reaction"),
+        "reaction_add",
+        channel_id=self.channel.id,
+        author_id=self.target.id,
+        message_id=message.id,
+    )
 
 
+@records_completion
 async def wait_for_message(self):
     """ Wait for the bot the send any message. Will fail on timeout, but will ignore messages sent by anything other
     that the target.
@@ -40,14 +78,12 @@ async def wait_for_message(self):
     :rtype: discord.Message
     :raises: NoResponseError
     """
-    try:
-        result = await self.client.wait_for(
-            "message", timeout=self.client.timeout, check=self._check_message
-        )
-    except TimeoutError:
-        raise NoResponseError
-    else:
-        return result
+    return await self._wait_for(
+        self._start_timing("wait_for_message"),
+        "message",
+        channel_id=self.channel.id,
+        author_id=self.target.id,
+    )
 
 
 async def wait_for_message_in_channel(self, content, channel_id):
@@ -62,13 +98,14 @@ async def wait_for_message_in_channel(self, content, channel_id):
     """
 
     def check_for_message_in_channel(message):
-        return message.channel.id == channel_id and message.content == content
+        return message.content == content
 
     return await self.wait_for_event(
-        "message", check=check_for_message_in_channel, timeout=30
+        "message", check=check_for_message_in_channel, timeout=30, channel_id=channel_id
     )
 
 
+@records_completion
 async def wait_for_reply(self, content):
     """ Send a message with ``content`` and returns the next message that the targeted bot sends. Used in many other
     tests.
@@ -78,30 +115,99 @@ async def wait_for_reply(self, content):
     :rtype: discord.Message
     :raises: NoResponseError
     """
-    await self.channel.send(content)
-    return await self.wait_for_message()
+    timing = self._start_timing("wait_for_reply")
+    await self._send(content, timing)
+    timing.mark_sent()
+    return await self._wait_for(
+        timing, "message", channel_id=self.channel.id, author_id=self.target.id
+    )
 
 
+@records_completion
 async def wait_for_event(
-    self, event: str, check: Optional[Callable[..., bool]] = None, timeout: float = None
+    self,
+    event: str,
+    check: Optional[Callable[..., bool]] = None,
+    timeout: float = None,
+    channel_id: Optional[int] = None,
+    author_id: Optional[int] = None,
+    message_id: Optional[int] = None,
 ):
-    """ A wrapper for the discord.py function :py:func:`wait_for <discord.Client.wait_for>`, tuned to be useful for distest.
+    """ Like the discord.py function :py:func:`wait_for <discord.Client.wait_for>`, tuned to be useful for distest.
+
+    Events are routed through the client's :py:class:`EventRouter <distest.router.EventRouter>`, so passing any of
+    ``channel_id``, ``author_id`` or ``message_id`` is much cheaper than doing the same filtering in ``check``.
 
     See https://discordpy.readthedocs.io/en/latest/api.html#event-reference for a list of events.
 
     :param event: The discord.py event, as a string and with the ``on_`` removed from the beginning.
     :param Callable[...,bool] check: A check function that all events of the type are ran against. Should return true when the desired event occurs, takes the event's params as it's params
     :param float timeout: How many seconds to wait for the event to occur.
+    :param int channel_id: Only match events that happen in this channel.
+    :param int author_id: Only match events caused by this user.
+    :param int message_id: Only match events about this message.
     :return: The parameters of the event requested
     :raises: NoResponseError
     """
-    if timeout is None:
-        timeout = self.client.timeout
+    # TODO: What happens if the event is wrong / not valid?
+    return await self._wait_for(
+        self._start_timing("wait_for_event"),
+        event,
+        timeout=timeout,
+        channel_id=channel_id,
+        author_id=author_id,
+        message_id=message_id,
+        check=check,
+    )
+
 
+async def collect_replies(self, contents, count=None, until=None, idle=None, deadline=None):
+    """ Send a message with ``contents`` and stream back the messages the target sends in the channel after it, for
+    commands whose output is split over several messages. Assertions can be run on each message as it arrives:
+
+    .. code-block:: python
+
+        async for message in interface.collect_replies("!help", until=lambda m: m.content.endswith("(end)")):
+            await interface.assert_message_contains(message, "!")
+
+    The stream ends after whichever of these comes first:
+
+    :param str contents: The text of the trigger message.
+    :param int count: The number of messages to collect.
+    :param Callable[[discord.Message],bool] until: A check that is true on the last message, which is still yielded.
+    :param float idle: How many seconds without a message end the stream. Defaults to the timeout.
+    :param float deadline: How many seconds after the trigger was sent to stop collecting, no matter what.
+    :returns: An async generator of the target's messages.
+    :rtype: AsyncIterator[discord.Message]
+    :raises: NoResponseError if the target doesn't send anything at all
+    """
+    timing = self._start_timing("collect_replies")
+    if idle is None:
+        idle = self._timeout_for(timing.kind)
+    loop = get_event_loop()
+    started = loop.time()
+    collected = 0
     try:
-        result = await self.client.wait_for(event, timeout=timeout, check=check)
-    except TimeoutError:
-        raise NoResponseError
-    # TODO: What happens if the event is wrong / not valid?
-    else:
-        return result
+        with self.client.router.subscribe(
+            "message", channel_id=self.channel.id, author_id=self.target.id
+        ) as replies:
+            await self._send(contents, timing)
+            timing.mark_sent()
+            end = None if deadline is None else loop.time() + deadline
+            while count is None or collected < count:
+                wait = idle if end is None else min(idle, end - loop.time())
+                try:
+                    _, message, seq = await replies.get(timeout=max(wait, 0))
+                except TimeoutError:
+                    if collected == 0:
+                        raise self._no_response(started)
+                    return
+                # So later waits don't find this message in the buffer again
+                self._consumed_seq["message", self.channel.id] = seq
+                timing.mark_event()
+                collected += 1
+                yield message
+                if until is not None and until(message):
+                    return
+    finally:
+        timing.mark_completed()
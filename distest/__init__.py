@@ -1,8 +1,19 @@
 import argparse
+import os
 import sys
 
-from .bot import DiscordInteractiveInterface, DiscordCliInterface
 from .collector import TestCollector
+from .TestInterface import SPECIAL_TEST_NAMES
+
+
+def __getattr__(name):
+    # The bots pull in discord.py, which takes most of distest's start up time, so they are only imported when a bot
+    # is about to be started, or something else asks for them
+    if name in ("DiscordInteractiveInterface", "DiscordCliInterface"):
+        from . import bot
+
+        return getattr(bot, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 def run_dtest_bot(sysargs, test_collector, timeout=5):
@@ -15,10 +26,7 @@ def run_dtest_bot(sysargs, test_collector, timeout=5):
                         tests. Defaults to 5 seconds.
     """
     from distest.validate_discord_token import token_arg
-
-    all_run_options = ["all"]
-    for i in test_collector._tests:
-        all_run_options.append(i.name)
+    from distest.sharding import parse_shard, load_durations, shard_tests
 
     parser = argparse.ArgumentParser(
         description="A small library used to write automated unit tests for Discord bots. "
@@ -38,8 +46,8 @@ def run_dtest_bot(sysargs, test_collector, timeout=5):
         "bot_token",
         metavar="tester_bot_token",
         type=token_arg,
-        nargs=1,
-        help="The bot token for the testing bot (this bot).",
+        nargs="?",
+        help="The bot token for the testing bot (this bot). Not needed with --offline.",
     )
     cli_only = parser.add_argument_group("CLI Only")
     cli_only.add_argument(
@@ -57,9 +65,9 @@ def run_dtest_bot(sysargs, test_collector, timeout=5):
         "--run",
         "-r",
         type=str,
-        choices=all_run_options,
         help="Runs the bot in run mode, equivalent to ::run <option>. "
-             "Options are listed, they are the tests declared in the bot and the three default options."
+             "Options are all, unrun, failed, the name of a test, a glob pattern matching test names "
+             "(e.g. 'test_reply_*') or tag:<tag> for every test with that tag. "
              "Required for the bot to be run in CLI mode, if using in Interactive mode, don't specify this",
     )
     run_stats_group.add_argument(
@@ -69,6 +77,13 @@ def run_dtest_bot(sysargs, test_collector, timeout=5):
         help="Runs the bot in stats mode, outputting the last runs stats. "
              "Equivalent to ::stats",
     )
+    cli_only.add_argument(
+        "--offline",
+        metavar="module:client",
+        type=str,
+        help="Run against an in-process fake Discord instead of the real one, no network or tokens needed. "
+             "Takes the import path of the target bot's client, e.g. example_target:client",
+    )
     parser.add_argument(
         "--timeout",
         "-t",
@@ -77,38 +92,235 @@ def run_dtest_bot(sysargs, test_collector, timeout=5):
         help="Changes the timeout (in seconds) on tests before they are assumed to have failed. "
              "Default is 5 sec.",
     )
+    cli_only.add_argument(
+        "--record",
+        metavar="path",
+        type=str,
+        help="Record every gateway event and HTTP response of the run to this file (gzipped if it ends in .gz), "
+             "so it can be replayed later with --replay.",
+    )
+    cli_only.add_argument(
+        "--replay",
+        metavar="path",
+        type=str,
+        help="Rerun the tests against a recording made with --record instead of Discord, no network, tokens or "
+             "target bot needed.",
+    )
+    cli_only.add_argument(
+        "--junit-xml",
+        metavar="path",
+        type=str,
+        help="Write the results to a JUnit XML file as each test finishes.",
+        dest="junit_xml",
+    )
+    cli_only.add_argument(
+        "--jsonl",
+        metavar="path",
+        type=str,
+        help="Write the results to a JSON lines file as each test finishes, one object per test.",
+    )
+    parser.add_argument(
+        "--adaptive-timeout",
+        metavar="path",
+        type=str,
+        help="Learn how long each wait needs from previous runs, keeping the history in this file. Waits and silence "
+             "checks then time out after a high percentile of that history plus a margin, never more than --timeout.",
+        dest="adaptive_timeout",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="The maximum number of tests to run at the same time, each in its own channel from the channel pool. "
+             "Tests marked as serial are always run on their own. Default is 1.",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="path",
+        type=str,
+        help="A SQLite file to keep every test result in. Results are restored from it on start up for tests whose "
+             "code hasn't changed, so failed, unrun, changed and --stats work across restarts.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="directory",
+        type=str,
+        help="Sample where the tester spends its CPU time and measure event loop lag, per test, and write "
+             "flamegraph-ready collapsed stacks and a lag summary to this directory. Not available with --load.",
+    )
+    parser.add_argument(
+        "--max-failures",
+        metavar="count",
+        type=int,
+        help="Stop starting tests once this many have failed or errored in a run, the rest are left unrun.",
+        dest="max_failures",
+    )
+    parser.add_argument(
+        "--test-deadline",
+        metavar="seconds",
+        type=float,
+        help="Cancel any test that is still running after this many seconds and record it as an error, however "
+             "long its waits are. Tests can set their own with @test_collector(deadline=...).",
+        dest="test_deadline",
+    )
+    parser.add_argument(
+        "--target-timings",
+        metavar="path",
+        type=str,
+        help="The file an instrumented target writes its processing times to, see distest.instrument. The stats then "
+             "split each wait into the target's processing and the time spent going through Discord. With --offline, "
+             "the target is instrumented automatically.",
+        dest="target_timings",
+    )
+    parser.add_argument(
+        "--stall-retries",
+        metavar="count",
+        type=int,
+        default=0,
+        help="How many times a wait that timed out while the tester's event loop or gateway connection was stalled "
+             "is extended by the length of the stall before failing. Default is 0, waits are never extended.",
+        dest="stall_retries",
+    )
+    cli_only.add_argument(
+        "--load",
+        metavar="rate",
+        type=float,
+        help="Load test the target instead: start this many runs of the --run tests every second, each by a virtual "
+             "user in a channel from the channel pool, and report throughput, errors and latency histograms.",
+    )
+    cli_only.add_argument(
+        "--load-duration",
+        metavar="seconds",
+        type=float,
+        default=60,
+        help="How long to keep starting runs for in a load test. Default is 60.",
+        dest="load_duration",
+    )
+    cli_only.add_argument(
+        "--load-users",
+        metavar="count",
+        type=int,
+        help="How many runs can be in progress at once in a load test, runs that are due while they all are busy are "
+             "dropped. Defaults to one per channel.",
+        dest="load_users",
+    )
+    cli_only.add_argument(
+        "--load-report",
+        metavar="path",
+        type=str,
+        help="Write the load test report to this file as JSON.",
+        dest="load_report",
+    )
+    cli_only.add_argument(
+        "--shard",
+        metavar="i/N",
+        type=parse_shard,
+        help="Only run the i-th of N shards of the suite, so it can be split over N tester bots. "
+             "See distest.sharding for a coordinator that runs all the shards.",
+    )
+    cli_only.add_argument(
+        "--shard-durations",
+        metavar="path",
+        type=str,
+        help="A results file from a previous --jsonl run. With --shard, the suite is split so every shard takes about "
+             "as long as the others, instead of by a hash of the test names.",
+        dest="shard_durations",
+    )
+    parser.add_argument(
+        "--channel-pool",
+        metavar="channel",
+        type=int,
+        nargs="+",
+        default=[],
+        help="Extra channel IDs that tests can be run in when running with more than one job.",
+        dest="channel_pool",
+    )
 
     sysargs.pop(0)  # Pops off the first arg (the filename that is being run)
     clean_args = vars(parser.parse_args(sysargs))
+    try:
+        test_collector.with_prerequisites(test_collector)
+    except (KeyError, ValueError) as error:
+        parser.error(error.args[0])
+    if clean_args["run"] is not None and clean_args["run"] not in SPECIAL_TEST_NAMES:
+        if not test_collector.select(clean_args["run"]):
+            parser.error("no tests match --run {}".format(clean_args["run"]))
 
     # Makes the changing of the timeout optional
     if clean_args.get("timeout") is not None:
         timeout = clean_args.get("timeout")[0]
 
+    for option in ("offline", "record", "replay", "shard", "load"):
+        if clean_args[option] is not None and clean_args["run"] is None:
+            parser.error("--{} can only be used in CLI mode, with --run".format(option))
+    if clean_args["offline"] is not None and clean_args["replay"] is not None:
+        parser.error("--offline and --replay can't be used together")
+    if clean_args["load"] is not None and clean_args["profile"] is not None:
+        parser.error("--profile can't be used with --load, only test runs are profiled")
+    if clean_args["offline"] is None and clean_args["replay"] is None and clean_args["bot_token"] is None:
+        parser.error("the following arguments are required: tester_bot_token")
+
+    if clean_args["shard"] is not None:
+        durations = None
+        if clean_args["shard_durations"] is not None and os.path.exists(clean_args["shard_durations"]):
+            durations = load_durations(clean_args["shard_durations"])
+        test_collector = shard_tests(test_collector, *clean_args["shard"], durations=durations)
+
     # Controls whether or not the bot is run in CLI mode based on the parameters present
     if clean_args["run"] is not None:
         # If --run is present, the bot should be in CLI mode
         print("In CLI mode")
         run_command_line_bot(
             clean_args.get("bot_target")[0],
-            clean_args.get("bot_token")[0],
+            clean_args.get("bot_token"),
             clean_args.get("run"),
-            clean_args.get("channel")[0],
+            (clean_args.get("channel") or [None])[0],
             clean_args.get("stats"),
             test_collector,
             timeout,
+            clean_args.get("jobs"),
+            clean_args.get("channel_pool"),
+            clean_args.get("offline"),
+            clean_args.get("junit_xml"),
+            clean_args.get("jsonl"),
+            clean_args.get("adaptive_timeout"),
+            clean_args.get("record"),
+            clean_args.get("replay"),
+            clean_args.get("history"),
+            clean_args.get("profile"),
+            clean_args.get("stall_retries"),
+            clean_args.get("max_failures"),
+            clean_args.get("test_deadline"),
+            clean_args.get("target_timings"),
+            load=clean_args.get("load"),
+            load_duration=clean_args.get("load_duration"),
+            load_users=clean_args.get("load_users"),
+            load_report=clean_args.get("load_report"),
         )
     else:
         print("Not in CLI mode")
         run_interactive_bot(
             clean_args.get("bot_target")[0],
-            clean_args.get("bot_token")[0],
+            clean_args.get("bot_token"),
             test_collector,
             timeout,
+            clean_args.get("jobs"),
+            clean_args.get("channel_pool"),
+            clean_args.get("adaptive_timeout"),
+            clean_args.get("history"),
+            clean_args.get("profile"),
+            clean_args.get("stall_retries"),
+            clean_args.get("max_failures"),
+            clean_args.get("test_deadline"),
+            clean_args.get("target_timings"),
         )
 
 
-def run_interactive_bot(target_name, token, test_collector, timeout=5):
+def run_interactive_bot(
+        target_name, token, test_collector, timeout=5, jobs=1, channel_pool=None, adaptive_timeout=None, history=None,
+        profile=None, stall_retries=0, max_failures=None, test_deadline=None, target_timings=None,
+):
     """ Run the bot in interactive mode.
 
         Relies on :py:func:`run_dtest_bot` to parse the command line arguments and pass them here.
@@ -118,13 +330,75 @@ def run_interactive_bot(target_name, token, test_collector, timeout=5):
         :param str token: The tester's token, used to log in.
         :param TestCollector test_collector: The collector that gathered our tests.
         :param int timeout: The amount of time to wait for responses before failing tests.
+        :param int jobs: The maximum number of tests to run at the same time.
+        :param list[int] channel_pool: IDs of extra channels that tests can be run in when ``jobs`` is more than 1.
+        :param str adaptive_timeout: If given, the file to keep a :py:class:`LatencyHistory
+                                     <distest.adaptive.LatencyHistory>` in and learn timeouts from.
+        :param str history: If given, the SQLite file to keep a :py:class:`RunHistory <distest.history.RunHistory>`
+                            of every result in.
+        :param str profile: If given, profile every run with a :py:class:`RunProfiler
+                            <distest.profiling.RunProfiler>` and write the results to this directory.
+        :param int stall_retries: How many times a wait is extended for stalls, see :py:class:`HealthMonitor
+                                  <distest.health.HealthMonitor>`.
+        :param int max_failures: If given, stop starting tests after this many have failed or errored in a run.
+        :param float test_deadline: If given, cancel tests that run for longer than this many seconds.
+        :param str target_timings: If given, the file to read the timings of an instrumented target from, see
+                                   :py:mod:`distest.instrument`.
     """
 
-    bot = DiscordInteractiveInterface(target_name, test_collector, timeout)
+    from distest.bot import DiscordInteractiveInterface
+
+    bot = DiscordInteractiveInterface(target_name, test_collector, timeout, jobs, channel_pool)
+    if adaptive_timeout is not None:
+        from distest.adaptive import LatencyHistory
+
+        bot.latency_history = LatencyHistory(adaptive_timeout)
+    if history is not None:
+        from distest.history import RunHistory
+
+        bot.history = RunHistory(history)
+        bot.history.restore(test_collector)
+    if profile is not None:
+        from distest.profiling import RunProfiler
+
+        bot.profiler = RunProfiler(profile)
+    bot.health.retries = stall_retries
+    bot.max_failures = max_failures
+    bot.test_deadline = test_deadline
+    if target_timings is not None:
+        from distest.instrument import TargetTimings
+
+        bot.target_timings = TargetTimings(target_timings)
     bot.run(token)  # Starts the bot
 
 
-def run_command_line_bot(target, token, tests, channel_id, stats, collector, timeout):
+def run_command_line_bot(
+        target,
+        token,
+        tests,
+        channel_id,
+        stats,
+        collector,
+        timeout,
+        jobs=1,
+        channel_pool=None,
+        offline_target=None,
+        junit_xml=None,
+        jsonl=None,
+        adaptive_timeout=None,
+        record=None,
+        replay=None,
+        history=None,
+        profile=None,
+        stall_retries=0,
+        max_failures=None,
+        test_deadline=None,
+        target_timings=None,
+        load=None,
+        load_duration=60,
+        load_users=None,
+        load_report=None,
+):
     """ Start the bot in command-line mode. The program will exit 1 if any of the tests failed.
 
         Relies on :py:func:`run_dtest_bot` to parse the command line arguments and pass them here.
@@ -137,7 +411,131 @@ def run_command_line_bot(target, token, tests, channel_id, stats, collector, tim
         :param bool stats: Determines whether or not to display stats after run.
         :param TestCollector collector: The collector that gathered our tests.
         :param int timeout: The amount of time to wait for responses before failing tests.
+        :param int jobs: The maximum number of tests to run at the same time.
+        :param list[int] channel_pool: IDs of extra channels that tests can be run in when ``jobs`` is more than 1.
+        :param str offline_target: If given, run against a :py:class:`FakeDiscord <distest.offline.FakeDiscord>`
+                                   instead of Discord, with the target client imported from this ``module:client``
+                                   path. ``token`` is ignored and any channel IDs are created in the fake guild.
+        :param str junit_xml: If given, stream the results to this JUnit XML file.
+        :param str jsonl: If given, stream the results to this JSON lines file.
+        :param str adaptive_timeout: If given, the file to keep a :py:class:`LatencyHistory
+                                     <distest.adaptive.LatencyHistory>` in and learn timeouts from.
+        :param str record: If given, record the run to this file with a :py:class:`Recorder
+                           <distest.replay.Recorder>`.
+        :param str replay: If given, replay the recording in this file with a :py:class:`ReplayDiscord
+                           <distest.replay.ReplayDiscord>` instead of connecting to Discord. ``token`` is ignored, and
+                           the channels and number of jobs that were recorded are used.
+        :param str history: If given, the SQLite file to keep a :py:class:`RunHistory <distest.history.RunHistory>`
+                            of every result in, and restore the last results from.
+        :param str profile: If given, profile the run with a :py:class:`RunProfiler <distest.profiling.RunProfiler>`
+                            and write the results to this directory. Can't be used with ``load``.
+        :param int stall_retries: How many times a wait is extended for stalls, see :py:class:`HealthMonitor
+                                  <distest.health.HealthMonitor>`.
+        :param int max_failures: If given, stop starting tests after this many have failed or errored in a run.
+        :param float test_deadline: If given, cancel tests that run for longer than this many seconds.
+        :param str target_timings: If given, the file to read the timings of an instrumented target from, see
+                                   :py:mod:`distest.instrument`. With ``offline_target``, the target is instrumented
+                                   to write to it.
+        :param float load: If given, load test the target with a :py:class:`LoadRunner <distest.load.LoadRunner>`
+                           that starts this many runs of ``tests`` a second, instead of running them once.
+        :param float load_duration: How many seconds to load test for.
+        :param int load_users: How many runs can be in progress at once in the load test.
+        :param str load_report: If given, write the :py:class:`LoadReport <distest.load.LoadReport>` to this file.
+        :raises: ValueError if both ``profile`` and ``load`` are given
     """
-    m_bot = DiscordCliInterface(target, collector, tests, channel_id, stats, timeout)
-    failed = m_bot.run(token)  # returns True if a test failed
-    sys.exit(1 if failed else 0)  # Calls sys.exit based on the state of `failed`
+    if profile is not None and load is not None:
+        raise ValueError("A load test can't be profiled, only test runs are")
+
+    from distest.reporters import JsonLinesReporter, JUnitXmlReporter
+
+    reporters = []
+    if junit_xml is not None:
+        reporters.append(JUnitXmlReporter(junit_xml))
+    if jsonl is not None:
+        reporters.append(JsonLinesReporter(jsonl))
+
+    backend = None
+    if offline_target is not None:
+        from distest.offline import FakeDiscord, load_client
+
+        backend = FakeDiscord()
+        channel_id = channel_id or backend.default_channel_id
+        for pool_channel_id in [channel_id] + list(channel_pool or []):
+            if pool_channel_id not in backend.channels:
+                backend.add_text_channel("distest-{}".format(pool_channel_id), pool_channel_id)
+    elif replay is not None:
+        from distest.replay import ReplayDiscord
+
+        backend = ReplayDiscord(replay)
+        # The requests have to go to the same channels as in the recording to match it
+        channel_id = channel_id or backend.meta.get("channel_id")
+        channel_pool = channel_pool or backend.meta.get("channel_pool")
+        jobs = backend.meta.get("jobs", jobs)
+
+    from distest.bot import DiscordCliInterface
+
+    m_bot = DiscordCliInterface(target, collector, tests, channel_id, stats, timeout, jobs, channel_pool)
+    m_bot.reporters.extend(reporters)
+    if backend is not None:
+        # The fake backends don't rate limit, and a replay should go as fast as it can
+        m_bot.send_scheduler = None
+    if adaptive_timeout is not None:
+        from distest.adaptive import LatencyHistory
+
+        m_bot.latency_history = LatencyHistory(adaptive_timeout)
+    if history is not None:
+        from distest.history import RunHistory
+
+        m_bot.history = RunHistory(history)
+        m_bot.history.restore(collector)
+    if profile is not None:
+        from distest.profiling import RunProfiler
+
+        m_bot.profiler = RunProfiler(profile)
+    m_bot.health.retries = stall_retries
+    m_bot.max_failures = max_failures
+    m_bot.test_deadline = test_deadline
+    if target_timings is not None:
+        from distest.instrument import TargetTimings
+
+        m_bot.target_timings = TargetTimings(target_timings)
+    if load is not None:
+        from distest.load import LoadRunner
+
+        m_bot.load = LoadRunner(load, load_duration, load_users)
+        m_bot.load_report = load_report
+
+    clients = [m_bot]
+    if offline_target is not None:
+        target_client = load_client(offline_target)
+        backend.attach(target_client, name="target", user_id=target)
+        backend.attach(m_bot, name="distest")
+        if target_timings is not None:
+            from distest.instrument import instrument_target
+
+            instrument_target(target_client, target_timings)
+        clients.append(target_client)
+    elif replay is not None:
+        backend.attach(m_bot)
+
+    recorder = None
+    if record is not None:
+        from distest.replay import Recorder
+
+        recorder = Recorder(record)
+        recorder.meta(channel_id=channel_id, target=target, tests=tests, jobs=jobs, channel_pool=channel_pool)
+        recorder.install(m_bot)
+
+    try:
+        if backend is None:
+            m_bot.run(token)
+        else:
+            backend.run(*clients)
+    finally:
+        for reporter in reporters:
+            reporter.close()
+        if recorder is not None:
+            recorder.save()
+        if m_bot.history is not None:
+            m_bot.history.close()
+    sys.exit(1 if m_bot.failure else 0)  # Calls sys.exit based on the state of `failure`
@@ -0,0 +1,94 @@
+"""
+Adaptive timeouts, learned from how fast the target has replied in previous runs.
+
+With a single global timeout, a test that passes only waits as long as the target takes to reply, but every wait that
+fails and every :py:meth:`ensure_silence <distest.TestInterface.TestInterface.ensure_silence>` burns the whole
+timeout. :py:class:`LatencyHistory` keeps the latencies seen by each test and assertion kind in a JSON file between
+runs, and works out a timeout for each wait from a high percentile of that history plus a margin. Adaptive timeouts
+are never longer than the configured timeout, and the configured timeout is used until there is enough history.
+"""
+
+import json
+import os
+
+from .TestInterface import TestResult
+from .timing import percentile
+
+#: Timing kinds that wait for the target to send a message, used as the fallback history for silence checks
+MESSAGE_KINDS = ("wait_for_reply", "wait_for_message")
+
+
+class LatencyHistory:
+    """ The latencies seen by every test, per assertion kind, stored in a JSON file.
+
+    :param str path: The file to keep the history in, it is created on the first :py:meth:`save`
+    :param float pct: The percentile of the history to base timeouts on
+    :param float margin: What to multiply the percentile by to get the timeout
+    :param float padding: Seconds added on top of that, to absorb jitter on very fast replies
+    :param float minimum: The shortest timeout that will ever be used, in seconds
+    :param int min_samples: How many latencies must have been seen before the history is trusted
+    :param int max_samples: How many of the most recent latencies to keep for each test and kind
+    """
+
+    def __init__(self, path, pct=99, margin=1.5, padding=0.25, minimum=0.5, min_samples=5, max_samples=100):
+        self.path = path
+        self.pct = pct
+        self.margin = margin
+        self.padding = padding
+        self.minimum = minimum
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._tests = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self._tests = json.load(file).get("tests", {})
+
+    def _from_samples(self, samples, default):
+        if len(samples) < self.min_samples:
+            return default
+        timeout = percentile(samples, self.pct) * self.margin + self.padding
+        return min(default, max(self.minimum, timeout))
+
+    def timeout_for(self, test_name, kind, default):
+        """ Work out the timeout for a wait of type ``kind`` in the test ``test_name``.
+
+        :param str test_name: The name of the test that is waiting
+        :param str kind: The kind of wait, as in :py:attr:`AssertionTiming.kind <distest.timing.AssertionTiming.kind>`
+        :param float default: The configured timeout, used if there isn't enough history and never exceeded
+        :rtype: float
+        """
+        return self._from_samples(self._tests.get(test_name, {}).get(kind, []), default)
+
+    def silence_timeout(self, test_name, default):
+        """ Work out how long a silence check in ``test_name`` has to wait to be confident the target isn't going to
+        reply: longer than the target has ever taken to send a message in this test or, failing that, in any test.
+
+        :param str test_name: The name of the test that is checking for silence
+        :param float default: The configured timeout, used if there isn't enough history and never exceeded
+        :rtype: float
+        """
+        own = [value for kind in MESSAGE_KINDS for value in self._tests.get(test_name, {}).get(kind, [])]
+        if len(own) >= self.min_samples:
+            return self._from_samples(own, default)
+        pooled = [value for kinds in self._tests.values() for kind in MESSAGE_KINDS for value in kinds.get(kind, [])]
+        return self._from_samples(pooled, default)
+
+    def record(self, test):
+        """ Add the latencies of a test that just ran to the history. Only tests that passed are learned from.
+
+        :param Test test: The test that just finished
+        """
+        if test.result is not TestResult.SUCCESS:
+            return
+        kinds = self._tests.setdefault(test.name, {})
+        for timing in test.timings:
+            if timing.latency is None:
+                continue
+            samples = kinds.setdefault(timing.kind, [])
+            samples.append(round(timing.latency, 4))
+            del samples[: -self.max_samples]
+
+    def save(self):
+        """ Write the history to :py:attr:`path` """
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "tests": self._tests}, file)
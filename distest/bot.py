@@ -9,23 +9,104 @@ commands sent from discord to run tests, display stats, and more
 start the bot when it wakes up
 """
 
+import asyncio
+import time
+import traceback
+
 import discord
 
 from .TestInterface import TestResult, Test, TestInterface
-from .exceptions import TestRequirementFailure
+from .exceptions import DeadlineExceededError, PrerequisiteFailedError, TestRequirementFailure
 from .collector import TestCollector
+from .fixtures import FixtureManager
+from .health import HealthMonitor
+from .instrument import format_split
+from .patterns import pattern_cache
+from .ratelimit import SendScheduler
+from .router import EventRouter
+from .timing import LatencyReport
 
 HELP_TEXT = """\
 **::help** - Show this help
 **::run** all - Run all tests
 **::run** unrun - Run all tests that have not been run
+**::run** failed - Run all tests that failed
+**::run** changed - Run all tests that have not passed since their code last changed
 **::run** *name* - Run a specific test
+**::run** *pattern* - Run every test whose name matches a glob pattern, like `test_reply_*`
+**::run** tag:*tag* - Run every test with a tag
 **::list** - List all the tests and their status
 """
 
-intents = discord.Intents.default()
-intents.members = True
-intents.presences = True
+def _awaiting_frames(coroutine):
+    """ The stack of a suspended coroutine, following what each coroutine is awaiting down to where it is stuck.
+
+    :rtype: traceback.StackSummary
+    """
+    frames = []
+    while getattr(coroutine, "cr_frame", None) is not None:
+        frames.append((coroutine.cr_frame, coroutine.cr_frame.f_lineno))
+        coroutine = coroutine.cr_await
+    return traceback.StackSummary.extract(frames)
+
+
+#: The selectors that pick tests by their last result, and the check each one runs on a test
+RESULT_FILTERS = {
+    "all": lambda test: True,
+    "unrun": lambda test: test.result is TestResult.UNRUN,
+    "failed": lambda test: test.result in (TestResult.FAILED, TestResult.ERROR),
+    "changed": lambda test: test.result is not TestResult.SUCCESS,
+}
+
+
+def format_stats(tests) -> str:
+    """ Construct the stat display of ``tests``. Iterate over each test and creates a string (``response``) based
+    on the result property of each ``Test``, followed by the latency percentiles of every assertion that was timed
+
+    :param tests: The tests used to create the stats
+    :type tests: Iterable[Test]
+    :return: Ready-to-send string congaing the results of the tests, including discord markdown
+    :rtype: str
+    """
+    tests = list(tests)
+    response = "```\n"
+    longest_name = max(map(lambda t: len(t.name), tests), default=0)
+    for test in tests:
+        response += test.name.rjust(longest_name) + " "
+        if test.needs_human:
+            response += "✋ "
+        else:
+            response += "   "
+        if test.result is TestResult.UNRUN:
+            response += "⚫ Not run"
+        elif test.result is TestResult.SUCCESS:
+            response += "✓ Passed"
+        elif test.result is TestResult.FAILED:
+            response += "✘ Failed"
+        elif test.result is TestResult.SKIPPED:
+            response += "↷ Skipped"
+        elif test.result is TestResult.ERROR:
+            response += "‼ Error"
+        if test.duration is not None and test.result is not TestResult.UNRUN:
+            response += " ({:.0f} ms)".format(test.duration * 1000)
+        response += "\n"
+    response += "```\n"
+    latency = LatencyReport(tests).format()
+    if latency:
+        response += "```\n" + latency + "```\n"
+    return response
+
+
+def default_intents() -> discord.Intents:
+    """ The gateway intents the tester connects with: the defaults, plus members and presences so it can find the
+    target and see if it is online.
+
+    :rtype: discord.Intents
+    """
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.presences = True
+    return intents
 
 
 class DiscordBot(discord.Client):
@@ -39,8 +120,35 @@ class DiscordBot(discord.Client):
     """
 
     def __init__(self, target_id):
-        super().__init__(intents=intents)
+        super().__init__(intents=default_intents())
         self._target_name = target_id
+        self.router = EventRouter()
+        self.reporters = []
+        self.latency_history = None
+        self.history = None
+        self.fixtures = None
+        self.profiler = None
+        self.recorder = None
+        #: A :py:class:`TargetTimings <distest.instrument.TargetTimings>` to read the target's own timings from, if any
+        self.target_timings = None
+        #: Seconds a test may run for before it is cancelled, ``None`` for no limit
+        self.test_deadline = None
+        #: How many tests can fail or error before the rest of the run is not started, ``None`` for no limit
+        self.max_failures = None
+        #: How many tests have failed or errored in the current run
+        self.failures = 0
+        self.send_scheduler = SendScheduler()
+        self.health = HealthMonitor()
+
+    def dispatch(self, event, *args, **kwargs):
+        """ Override of :py:meth:`discord.Client.dispatch` that hands every event to :py:attr:`router` as well, so
+        the ``wait_for_*`` functions get woken up only by the events they are indexed on. Raw gateway messages are
+        also given to the :py:class:`Recorder <distest.replay.Recorder>`, if the run is being recorded.
+        """
+        if self.recorder is not None and event == "socket_response":
+            self.recorder.gateway(args[0])
+        self.router.dispatch(event, *args)
+        super().dispatch(event, *args, **kwargs)
 
     def _find_target(self, server: discord.Guild) -> discord.Member:
         """ Confirms that the target user is actually present in the specified guild
@@ -62,31 +170,121 @@ class DiscordBot(discord.Client):
               "here for how to do so: https://discordpy.readthedocs.io/en/latest/intents.html")
         raise KeyError("Could not find member with id {}".format(self._target_name))
 
+    async def _call_test(self, test, test_interface):
+        """ Call the test function, with its fixtures if there are any, and tear down its function scoped fixtures """
+        if self.fixtures is not None:
+            try:
+                await self.fixtures.call(test, test_interface)
+            finally:
+                await self.fixtures.teardown("function", test)
+        else:
+            await test.func(test_interface)
+
+    async def _call_with_deadline(self, test, test_interface):
+        """ Call the test, cancelling it if it runs past its deadline or the run's :py:attr:`test_deadline`
+
+        :raises: DeadlineExceededError
+        """
+        deadline = test.deadline if test.deadline is not None else self.test_deadline
+        if deadline is None:
+            return await self._call_test(test, test_interface)
+        task = asyncio.ensure_future(self._call_test(test, test_interface))
+        try:
+            done, _ = await asyncio.wait({task}, timeout=deadline)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            # Cancelling only takes effect once the task runs again, so where it is stuck can still be printed after
+            task.cancel()
+            print("{} ran past its {:g} s deadline, cancelling it at:".format(test.name, deadline))
+            try:
+                coroutine = task.get_coro() if hasattr(task, "get_coro") else task._coro  # get_coro is 3.8+
+                print("".join(traceback.format_list(_awaiting_frames(coroutine))), end="")
+            except Exception:
+                traceback.print_exc()
+            await asyncio.wait({task})  # Let it tear its fixtures down
+            raise DeadlineExceededError(deadline)
+        return task.result()
+
     async def run_test(
             self, test: Test, channel: discord.TextChannel, stop_error=False
     ) -> TestResult:
         """ Run a single test in a given channel.
 
-            Updates the test with the result and returns it
+            Updates the test with the result, when it was run, how long it took and the timings of its assertions,
+            hands it to each of the :py:attr:`reporters <distest.reporters>` and returns the result. A test that
+            raises anything other than a :py:exc:`TestRequirementFailure
+            <distest.exceptions.TestRequirementFailure>`, or runs past its deadline, is recorded as an
+            :py:attr:`ERROR <distest.TestInterface.TestResult.ERROR>`.
 
             :param Test test: The :py:class:`Test <distest.TestInterface.Test>` that is to be run
             :param discord.TextChannel channel: The
-            :param stop_error: Weather or not to stop the program on error. Not currently in use.
+            :param stop_error: If false, the error of a test that fails or errors is raised again once it has been
+                               recorded, which stops the run.
             :return: Result of the test
             :rtype: TestResult
         """
-        test_interface = TestInterface(self, channel, self._find_target(channel.guild))
+        test_interface = TestInterface(self, channel, self._find_target(channel.guild), test)
+        test.last_run = time.time()
+        test.error = None
+        started = time.perf_counter()
         try:
             print("Running test: {}".format(test.name))
-            await test.func(test_interface)
-        except TestRequirementFailure:
+            if self.profiler is not None:
+                self.profiler.test_started(test)
+            await self._call_with_deadline(test, test_interface)
+        except TestRequirementFailure as error:
             test.result = TestResult.FAILED
+            test.error = error
+            self.failures += 1
+            if not stop_error:
+                raise
+        except Exception as error:
+            test.result = TestResult.ERROR
+            test.error = error
+            self.failures += 1
+            if not isinstance(error, DeadlineExceededError):  # Where it was stuck has already been printed
+                print("Error in test: {}".format(test.name))
+                traceback.print_exception(type(error), error, error.__traceback__)
             if not stop_error:
                 raise
         else:
             test.result = TestResult.SUCCESS
+        finally:
+            if self.profiler is not None:
+                self.profiler.test_finished(test)
+            test.timings = test_interface.timings
+            if self.target_timings is not None:
+                self.target_timings.annotate(test.timings)
+            # Time spent held back by the send scheduler is Discord's doing, not the target's
+            test.duration = time.perf_counter() - started - sum(timing.throttled for timing in test.timings)
+            if self.latency_history is not None:
+                self.latency_history.record(test)
+            if self.history is not None:
+                self.history.record(test)
+            for reporter in self.reporters:
+                reporter.test_finished(test)
         return test.result
 
+    def skip_test(self, test: Test, error: PrerequisiteFailedError):
+        """ Record that ``test`` was skipped, without running it, because a test it depends on didn't pass. The test
+        is handed to the reporters and the history like one that ran.
+
+        :param Test test: The test being skipped
+        :param PrerequisiteFailedError error: Which test it depends on didn't pass
+        """
+        print("Skipping test: {} ({})".format(test.name, error))
+        test.last_run = time.time()
+        test.result = TestResult.SKIPPED
+        test.error = error
+        test.duration = None
+        test.timings = []
+        if self.history is not None:
+            self.history.record(test)
+        for reporter in self.reporters:
+            reporter.test_finished(test)
+
 
 class DiscordInteractiveInterface(DiscordBot):
     """ A variant of the discord bot which commands sent in discord to allow
@@ -97,52 +295,152 @@ class DiscordInteractiveInterface(DiscordBot):
     :param str target_id: The name of the bot to target (Username, no discriminator)
     :param TestCollector collector: The instance of Test Collector that contains the tests to run
     :param int timeout: The amount of time to wait for responses before failing tests.
+    :param int jobs: The maximum number of tests to run at the same time. Defaults to 1 (run tests one at a time).
+    :param list[int] channel_pool: IDs of extra channels to run tests in when ``jobs`` is more than 1. Each test that
+                                   is running gets a channel to itself, so at most ``len(channel_pool) + 1`` tests will
+                                   run at once.
     """
 
-    def __init__(self, target_id, collector: TestCollector, timeout=5):
+    def __init__(self, target_id, collector: TestCollector, timeout=5, jobs=1, channel_pool=None):
         super().__init__(target_id)
         self._tests = collector
+        self.fixtures = FixtureManager(collector.fixtures)
         self.timeout = timeout
         self.failure = False
+        self.jobs = jobs
+        self._channel_pool_ids = channel_pool or []
+
+    def _get_channel_pool(self, channel, limit=None):
+        """ Build the list of channels tests can be spread over, starting with ``channel``.
+
+        :param discord.TextChannel channel: The channel the run was started in.
+        :param int limit: The most channels to return, defaults to the number of jobs
+        :rtype: list[discord.TextChannel]
+        """
+        pool = [channel]
+        for channel_id in self._channel_pool_ids:
+            pool_channel = self.get_channel(channel_id)
+            if pool_channel is None:
+                print("Could not find pool channel {}, skipping it.".format(channel_id))
+            elif pool_channel not in pool:
+                pool.append(pool_channel)
+        return pool[: max(self.jobs, 1) if limit is None else limit]
+
+    async def _run_batch(self, tests, pool):
+        """ Run ``tests`` concurrently, each one in a channel borrowed from ``pool`` for the length of the test. Each
+        test gets the free channel the :py:attr:`send_scheduler` can send in the soonest. A test that depends on others
+        in the batch only starts once they have finished, and is skipped if any of them didn't pass.
+
+        :param list[Test] tests: The tests to run, in dependency order, none of them may be ``serial``
+        :param list[discord.TextChannel] pool: The channels tests can be run in
+        """
+        free_channels = list(pool)
+        available = asyncio.Semaphore(len(pool))
+        finished = {test.name: asyncio.Event() for test in tests}
+
+        async def run_in_free_channel(test):
+            # Wait for the tests this one depends on before taking a channel, so they can have one
+            for name in test.depends_on:
+                if name in finished:
+                    await finished[name].wait()
+            try:
+                async with available:
+                    if self.send_scheduler is not None:
+                        pool_channel = self.send_scheduler.pick_channel(free_channels)
+                    else:
+                        pool_channel = free_channels[0]
+                    free_channels.remove(pool_channel)
+                    try:
+                        await self._run_unless_blocked(test, pool_channel)
+                    finally:
+                        free_channels.append(pool_channel)
+            finally:
+                finished[test.name].set()
+
+        await asyncio.gather(*(run_in_free_channel(test) for test in tests))
 
     async def _run_by_predicate(self, channel, filter=lambda test: True):
         """ Iterate through ``_tests`` and run any test for which ``filter`` returns True
 
+        If more than one job is allowed, runs of consecutive non-serial tests are spread over the channel pool and run
+        concurrently. Serial tests always run alone in ``channel``, after everything before them has finished, so the
+        declaration order is still respected around them. The tests that the chosen tests depend on are run too, see
+        :py:func:`_run_in_order`.
+
         :param discord.TextChannel channel: The channel to run the test in. :param function filter: The check a test
         must pass to be run. Used to filter tests by some criteria, defaults to just returning true for all. See
         :py:func:`run_tests <distest.DiscordInteractiveInterface.run_tests>` for examples
         """
-        for test in self._tests:
-            if filter(test):
-                await self.run_test(test, channel, stop_error=True)
+        await self._run_in_order(channel, [test for test in self._tests if filter(test)])
+
+    def _out_of_failures(self):
+        """ Whether the run has had :py:attr:`max_failures` failures, and shouldn't start any more tests """
+        return self.max_failures is not None and self.failures >= self.max_failures
+
+    async def _run_unless_blocked(self, test, channel):
+        """ Run ``test`` in ``channel``, or skip it if any of the tests it depends on didn't pass. Does nothing once
+        the run is out of failures, leaving the test unrun. """
+        if self._out_of_failures():
+            return
+        for name in test.depends_on:
+            prerequisite = self._tests.find_by_name(name)
+            if prerequisite.result is not TestResult.SUCCESS:
+                self.skip_test(test, PrerequisiteFailedError(name, prerequisite.result))
+                return
+        await self.run_test(test, channel, stop_error=True)
+
+    async def _run_in_order(self, channel, tests):
+        """ Run ``tests`` and every test they depend on, spreading them over the channel pool like
+        :py:func:`_run_by_predicate`. Tests run in the order given, except that each test runs after the tests it
+        depends on, see :py:meth:`TestCollector.with_prerequisites
+        <distest.collector.TestCollector.with_prerequisites>`. Tests whose prerequisites didn't pass are skipped.
+
+        :param discord.TextChannel channel: The channel to run serial tests in
+        :param list[Test] tests: The tests to run
+        """
+        tests = self._tests.with_prerequisites(tests)
+        pool = self._get_channel_pool(channel)
+        if len(pool) < 2:
+            for test in tests:
+                await self._run_unless_blocked(test, channel)
+            return
+
+        batch = []
+        for test in tests:
+            if not test.serial:
+                batch.append(test)
+                continue
+            await self._run_batch(batch, pool)
+            batch = []
+            await self._run_unless_blocked(test, channel)
+        await self._run_batch(batch, pool)
 
     async def _build_stats(self, tests) -> str:
-        """ Helper function for constructing the stat display based on test status.
-        Iterate over each test in ``tests`` and creates a string (``response``) based
-        on the result property of each ``Test``
+        """ Helper function for constructing the stat display based on test status, see :py:func:`format_stats`,
+        followed by the split of latency between the target and Discord if the target is instrumented, the counters of
+        the regex :py:data:`pattern_cache <distest.patterns.pattern_cache>` and the summary of the
+        :py:class:`HealthMonitor <distest.health.HealthMonitor>`. Sets ``failure`` if any of the tests failed or
+        errored.
 
         :param list[Test] tests: The list of tests used to create the stats
         :return: Ready-to-send string congaing the results of the tests, including
                  discord markdown
         :rtype: str
         """
-        response = "```\n"
-        longest_name = max(map(lambda t: len(t.name), tests))
-        for test in tests:
-            response += test.name.rjust(longest_name) + " "
-            if test.needs_human:
-                response += "✋ "
-            else:
-                response += "   "
-            if test.result is TestResult.UNRUN:
-                response += "⚫ Not run\n"
-            elif test.result is TestResult.SUCCESS:
-                response += "✓ Passed\n"
-            elif test.result is TestResult.FAILED:
-                response += "✘ Failed\n"
-                self.failure = True
-        response += "```\n"
-        return response
+        if any(test.result in (TestResult.FAILED, TestResult.ERROR) for test in tests):
+            self.failure = True
+        stats = format_stats(tests)
+        cache = pattern_cache.format()
+        if cache:
+            stats += "```\n" + cache + "```\n"
+        if self.target_timings is not None:
+            split = format_split(tests)
+            if split:
+                stats += "```\n" + split + "```\n"
+        health = self.health.format() if self.health is not None else ""
+        if health:
+            stats += "```\n" + health + "```\n"
+        return stats
 
     async def _display_stats(self, channel: discord.TextChannel):
         """ Display the status of the various tests. Just a send wrapper for
@@ -181,31 +479,58 @@ class DiscordInteractiveInterface(DiscordBot):
             elif message.content == "::help":
                 await message.channel.send(HELP_TEXT)
 
+    async def _end_run(self):
+        """ Tear down every module and session scoped fixture at the end of a run. A teardown that raises is printed and
+        fails the run, rather than cutting short everything else that happens at the end of it. """
+        try:
+            await self.fixtures.end_run()
+        except Exception as error:
+            print("Error tearing down the fixtures of the run:")
+            traceback.print_exception(type(error), error, error.__traceback__)
+            self.failure = True
+
     async def run_tests(self, channel: discord.TextChannel, name: str):
         """ Helper function for choosing and running an appropriate suite of tests
         Makes sure only tests that still need to be run are run, also prints
         to the console when a test is run
 
         :param discord.TextChannel channel: The channel in which to run the tests
-        :param str name: Selector string used to determine what category of test to run
+        :param str name: Selector string used to determine what category of test to run: ``all``, ``unrun``,
+                         ``failed``, ``changed`` or anything :py:meth:`TestCollector.select
+                         <distest.collector.TestCollector.select>` understands
         """
         print("Running: ", name)
-        if name == "all":
-            await self._run_by_predicate(channel)
-        elif name == "unrun":
-            await self._run_by_predicate(
-                channel, lambda test: test.result is TestResult.UNRUN
-            )
-        elif name == "failed":
-            await self._run_by_predicate(
-                channel, lambda test: test.result is TestResult.FAILED
-            )
-        elif self._tests.find_by_name(name) is None:
-            text = ":x: There is no test called `{}`"
-            await channel.send(channel, text.format(name))
-        else:
-            print("Running test: {}".format(name))
-            await self.run_test(self._tests.find_by_name(name), channel)
+        self.failures = 0
+        if self.health is not None:
+            self.health.start(self)
+        if self.profiler is not None:
+            self.profiler.start(self.health)
+        try:
+            if name in RESULT_FILTERS:
+                await self._run_by_predicate(channel, RESULT_FILTERS[name])
+            else:
+                tests = self._tests.select(name)
+                if not tests:
+                    text = ":x: There are no tests matching `{}`"
+                    await channel.send(text.format(name))
+                elif len(tests) == 1 and not tests[0].depends_on:
+                    print("Running test: {}".format(tests[0].name))
+                    await self.run_test(tests[0], channel, stop_error=True)
+                else:
+                    await self._run_in_order(channel, tests)
+        finally:
+            if self.health is not None:
+                self.health.stop()
+            # The run is over, so is every module and session scoped fixture
+            await self._end_run()
+        if self._out_of_failures():
+            print("Stopped the run after {} failures.".format(self.failures))
+        if self.latency_history is not None:
+            self.latency_history.save()
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.write()
+            print(self.profiler.format())
 
 
 class DiscordCliInterface(DiscordInteractiveInterface):
@@ -217,14 +542,20 @@ class DiscordCliInterface(DiscordInteractiveInterface):
     :param str test: The name of the test option (all, specific test, etc)
     :param int channel_id: The ID of the channel to run the bot in
     :param bool stats: If true, run in hstats mode.
+    :param int jobs: The maximum number of tests to run at the same time.
+    :param list[int] channel_pool: IDs of extra channels to run tests in when ``jobs`` is more than 1.
     """
 
-    def __init__(self, target_id, collector, test, channel_id, stats, timeout):
-        super().__init__(target_id, collector, timeout)
+    def __init__(self, target_id, collector, test, channel_id, stats, timeout, jobs=1, channel_pool=None):
+        super().__init__(target_id, collector, timeout, jobs, channel_pool)
         self._test_to_run = test
         self._channel_id = channel_id
         self._stats = stats
         self._channel = None
+        #: A :py:class:`LoadRunner <distest.load.LoadRunner>` to run the tests with as load scenarios, if any
+        self.load = None
+        #: The file to write the :py:class:`LoadReport <distest.load.LoadReport>` to, if any
+        self.load_report = None
 
     def run(self, token) -> int:
         """ Override of the default run() that returns failure state after completion.
@@ -238,6 +569,52 @@ class DiscordCliInterface(DiscordInteractiveInterface):
         super().run(token)
         return self.failure
 
+    async def _display_stats(self, channel: discord.TextChannel):
+        """ Display the status of the various tests in ``channel`` and on the console, so the results of a CLI run
+        can be read from its output.
+        """
+        stats = await self._build_stats(self._tests)
+        print(stats)
+        await channel.send(stats)
+
+    async def run_load(self, channel: discord.TextChannel, name: str):
+        """ Run the tests picked by ``name`` as scenarios of a load test with :py:attr:`load`, spread over ``channel``
+        and every channel in the pool. Prints the report, and sets ``failure`` if any scenario failed.
+
+        :param discord.TextChannel channel: The channel the run was started in
+        :param str name: Which tests to use, as for :py:meth:`run_tests`
+        """
+        if name in RESULT_FILTERS:
+            tests = [test for test in self._tests if RESULT_FILTERS[name](test)]
+        else:
+            tests = self._tests.select(name)
+        for test in tests:
+            if test.serial or test.needs_human or test.depends_on:
+                print("Leaving {} out of the load test, it can't be run on its own".format(test.name))
+        tests = [test for test in tests if not (test.serial or test.needs_human or test.depends_on)]
+        if not tests:
+            print("There are no tests to run as load scenarios.")
+            self.failure = True
+            return
+
+        channels = self._get_channel_pool(channel, limit=len(self._channel_pool_ids) + 1)
+        print("Load testing at {}/s for {} s over {} channel(s)".format(
+            self.load.rate, self.load.duration, len(channels)
+        ))
+        if self.health is not None:
+            self.health.start(self)
+        try:
+            report = await self.load.run(self, tests, channels)
+        finally:
+            if self.health is not None:
+                self.health.stop()
+            await self._end_run()
+        if report.failed:
+            self.failure = True
+        if self.load_report is not None:
+            report.save(self.load_report)
+        print(report.format())
+
     async def on_ready(self):
         """ Run all the tests sequentially when the bot becomes awake and exit when the
         tests finish. The CLI should run all by itself without prompting, and this allows it
@@ -246,9 +623,13 @@ class DiscordCliInterface(DiscordInteractiveInterface):
         self._channel = self.get_channel(self._channel_id)
         print("Started distest bot.")
         print(f"Invite Link: https://discordapp.com/oauth2/authorize?client_id={self.user.id}&scope=bot&permissions=8 ")
-        if self._test_to_run is not None:
-            await self.run_tests(self._channel, self._test_to_run)
-            await self._display_stats(self._channel)
-        elif self._stats:
-            await self._display_stats(self._channel)
-        await self.close()
+        try:
+            if self.load is not None:
+                await self.run_load(self._channel, self._test_to_run)
+            elif self._test_to_run is not None:
+                await self.run_tests(self._channel, self._test_to_run)
+                await self._display_stats(self._channel)
+            elif self._stats:
+                await self._display_stats(self._channel)
+        finally:
+            await self.close()
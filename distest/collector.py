@@ -5,7 +5,16 @@ Each test function in the tester bot should be decorated with an instance of Tes
 and must have a unique name. The TestCollector() is then passed onto the bot, which runs the tests.
 """
 
+import heapq
+from bisect import bisect_left
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
 from .TestInterface import Test
+from .fixtures import Fixture
+
+#: Characters that make a selector a glob pattern rather than a test name
+GLOB_CHARACTERS = "*?["
 
 
 class ExpectCalls:
@@ -55,9 +64,13 @@ class TestCollector:
     """
 
     def __init__(self):
-        self._tests = []
+        self._tests = OrderedDict()
+        self._order = {}
+        self._tags = {}
+        self._sorted_names = None
+        self.fixtures = {}
 
-    def add(self, function, name=None, needs_human=False):
+    def add(self, function, name=None, needs_human=False, serial=False, tags=(), depends_on=(), deadline=None):
         """ Adds a test function to the group, if one with that name is not already present
 
         :param func function: The function to add
@@ -65,12 +78,70 @@ class TestCollector:
                          with the provided name just like with :py:class:`discord.ext.commands.Command`.
                          See sample code above.
         :param bool needs_human: Optional boolean, true if the test requires a human interaction
+        :param bool serial: Optional boolean, true if the test can't safely run at the same time as other tests when
+                            running with more than one job
+        :param tags: Optional labels that the test can be selected by, with ``tag:<label>``
+        :type tags: Iterable[str]
+        :param depends_on: Optional names of tests that have to pass first. Running this test runs them too, and it
+                           is skipped if any of them don't pass.
+        :type depends_on: Iterable[str]
+        :param float deadline: Optional number of seconds the whole test may take before it is cancelled and recorded
+                               as an error, instead of the run's ``--test-deadline``
+        :raises: KeyError if there is already a test with that name
         """
         name = name or function.__name__
-        test = Test(name, function, needs_human=needs_human)
         if name in self._tests:
             raise KeyError("A test case called {} already exists.".format(name))
-        self._tests.append(test)
+        self._insert(
+            Test(
+                name,
+                function,
+                needs_human=needs_human,
+                serial=serial,
+                tags=tags,
+                depends_on=depends_on,
+                deadline=deadline,
+            )
+        )
+
+    def fixture(self, scope="function", name=None):
+        """ Register a fixture decorator-style, see :py:mod:`distest.fixtures`. Tests ask for it by taking a parameter
+        with its name after ``interface``.
+
+        :param str scope: How long the fixture's value is shared for, ``function``, ``module`` or ``session``
+        :param str name: The name tests ask for it by, defaults to the function name
+        :raises: KeyError if there is already a fixture with that name
+        """
+
+        def _decorator(function):
+            fixture_name = name or function.__name__
+            if fixture_name in self.fixtures:
+                raise KeyError("A fixture called {} already exists.".format(fixture_name))
+            self.fixtures[fixture_name] = Fixture(fixture_name, function, scope)
+            return function
+
+        return _decorator
+
+    def _insert(self, test):
+        self._order[test.name] = len(self._tests)
+        self._tests[test.name] = test
+        for tag in test.tags:
+            self._tags.setdefault(tag, []).append(test)
+        self._sorted_names = None
+
+    def subset(self, tests):
+        """ Make a new collector holding just ``tests``, in the order they were added to this one. The tests and
+        fixtures are shared, not copied.
+
+        :param tests: Tests from this collector
+        :type tests: Iterable[Test]
+        :rtype: TestCollector
+        """
+        collector = TestCollector()
+        collector.fixtures = self.fixtures
+        for test in sorted(tests, key=lambda test: self._order[test.name]):
+            collector._insert(test)
+        return collector
 
     def find_by_name(self, name):
         """ Return the test with the given name, return ``None`` if it does not exist.
@@ -78,10 +149,101 @@ class TestCollector:
         :param str name: The name of the test
         :rtype: :py:class:`Test <distest.TestInterface.Test>`, none
         """
-        for i in self._tests:
-            if i.name == name:
-                return i
-        return None
+        return self._tests.get(name)
+
+    def find_by_tag(self, tag):
+        """ Return every test with the given tag, in the order they were added.
+
+        :param str tag: The tag
+        :rtype: list[Test]
+        """
+        return list(self._tags.get(tag, ()))
+
+    def find_by_prefix(self, prefix):
+        """ Return every test whose name starts with ``prefix``, in the order they were added.
+
+        :param str prefix: The start of the names
+        :rtype: list[Test]
+        """
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._tests)
+        names = self._sorted_names
+        found = []
+        for i in range(bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix):
+                break
+            found.append(self._tests[names[i]])
+        return sorted(found, key=lambda test: self._order[test.name])
+
+    def find_by_glob(self, pattern):
+        """ Return every test whose name matches the glob ``pattern``, in the order they were added. Only the tests
+        that start with the part of the pattern before the first wildcard are checked.
+
+        :param str pattern: A pattern for :py:func:`fnmatch.fnmatchcase`, e.g. ``test_reply_*``
+        :rtype: list[Test]
+        """
+        wildcard = min((pattern.find(c) for c in GLOB_CHARACTERS if c in pattern), default=len(pattern))
+        return [test for test in self.find_by_prefix(pattern[:wildcard]) if fnmatchcase(test.name, pattern)]
+
+    def select(self, selector):
+        """ Return the tests picked out by ``selector``, in the order they were added. The selector can be:
+
+        * ``tag:<tag>``, every test with that tag
+        * a glob pattern containing ``*``, ``?`` or ``[``, every test whose name matches it
+        * the name of a test, just that test
+
+        :param str selector: The selector
+        :rtype: list[Test]
+        """
+        if selector.startswith("tag:"):
+            return self.find_by_tag(selector[4:])
+        if any(c in selector for c in GLOB_CHARACTERS):
+            return self.find_by_glob(selector)
+        test = self.find_by_name(selector)
+        return [] if test is None else [test]
+
+    def with_prerequisites(self, tests):
+        """ Add every test that ``tests`` depend on, directly or not, and order them all so each test comes after the
+        tests it depends on. Apart from that, tests stay in the order they were added.
+
+        :param tests: Tests from this collector
+        :type tests: Iterable[Test]
+        :rtype: list[Test]
+        :raises: KeyError if a test depends on one that doesn't exist, ValueError if tests depend on each other in a
+                 loop
+        """
+        needed = {}
+        to_visit = list(tests)
+        while to_visit:
+            test = to_visit.pop()
+            if test.name in needed:
+                continue
+            needed[test.name] = test
+            for name in test.depends_on:
+                if name not in self._tests:
+                    raise KeyError("{} depends on {}, which isn't a test".format(test.name, name))
+                to_visit.append(self._tests[name])
+
+        # Kahn's algorithm, always taking the earliest added test of the ones that are ready
+        waiting_on = {name: len(set(test.depends_on)) for name, test in needed.items()}
+        dependents = {}
+        for test in needed.values():
+            for name in set(test.depends_on):
+                dependents.setdefault(name, []).append(test.name)
+        ready = [(self._order[name], name) for name, count in waiting_on.items() if count == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            _, name = heapq.heappop(ready)
+            ordered.append(needed[name])
+            for dependent in dependents.get(name, ()):
+                waiting_on[dependent] -= 1
+                if waiting_on[dependent] == 0:
+                    heapq.heappush(ready, (self._order[dependent], dependent))
+        if len(ordered) < len(needed):
+            looped = sorted(name for name, count in waiting_on.items() if count)
+            raise ValueError("These tests depend on each other in a loop: {}".format(", ".join(looped)))
+        return ordered
 
     def __call__(self, *args, **kwargs):
         """ Add a test decorator-style, simply calls `add` when used to decorate something. """
@@ -93,4 +255,10 @@ class TestCollector:
 
     def __iter__(self):
         """ Makes the `TestCollector` able to be iterated over, which is really helpful in a number of cases."""
-        return (i for i in self._tests)
+        return iter(self._tests.values())
+
+    def __len__(self):
+        return len(self._tests)
+
+    def __contains__(self, name):
+        return name in self._tests
@@ -10,7 +10,17 @@ class TestRequirementFailure(Exception):
 
 
 class NoResponseError(TestRequirementFailure):
-    """ Raised when the target bot fails to respond to a message """
+    """ Raised when the target bot fails to respond to a message
+
+    :param HealthReport health: What the :py:class:`HealthMonitor <distest.health.HealthMonitor>` saw while waiting,
+                                if it was running
+    """
+
+    def __init__(self, *args, health=None):
+        if health is not None and not args:
+            args = (str(health),)
+        super().__init__(*args)
+        self.health = health
 
 
 class NoReactionError(TestRequirementFailure):
@@ -43,3 +53,60 @@ class ResponseDidNotMatchError(TestRequirementFailure):
 
 class ReactionDidNotMatchError(TestRequirementFailure):
     """ Raised when the target bot reacts with the wrong emoji """
+
+
+class PrerequisiteFailedError(Exception):
+    """ Recorded as the error of a test that was skipped because a test it depends on didn't pass
+
+    :param str test_name: The test that didn't pass
+    :param TestResult result: What its result was
+    """
+
+    def __init__(self, test_name, result):
+        super().__init__("{} {}".format(test_name, "was skipped" if result.name == "SKIPPED" else "failed"))
+        self.test_name = test_name
+        self.result = result
+
+
+class DeadlineExceededError(Exception):
+    """ Recorded as the error of a test that was cancelled for running past its deadline
+
+    :param float deadline: The deadline, in seconds
+    """
+
+    def __init__(self, deadline):
+        super().__init__("The test was still running after its {:g} s deadline".format(deadline))
+        self.deadline = deadline
+
+
+class ReplayMismatchError(Exception):
+    """ Raised when a replayed test run does something that isn't in the recording being replayed """
+
+
+class ExpectationsNotMetError(ResponseDidNotMatchError):
+    """ Raised when a reply fails one or more of the checks batched up with
+    :py:meth:`expect_reply <distest.TestInterface.TestInterface.expect_reply>`, lists every failed check at once.
+
+    :param list[str] failures: A description of each check that failed
+    """
+
+    def __init__(self, failures):
+        super().__init__("{} expectation(s) not met:\n{}".format(len(failures), "\n".join(failures)))
+        self.failures = failures
+
+
+class EmbedMismatchError(ResponseDidNotMatchError):
+    """ Raised when an embed doesn't match what was expected, with every difference that was found.
+
+    :param diff: The differences, as ``(embed index, key, expected, actual)`` tuples. The embed index is ``None`` if
+                 the message had no embed at all.
+    :type diff: list[tuple[Optional[int], str, Any, Any]]
+    """
+
+    def __init__(self, diff):
+        lines = []
+        for index, key, expected, actual in diff:
+            where = key if index is None else "embed {} {}".format(index, key)
+            lines.append("{}: expected {!r}, got {!r}".format(where, expected, actual))
+        super().__init__("\n".join(lines))
+        self.diff = diff
@@ -0,0 +1,171 @@
+"""
+Fixtures: shared setup and teardown that tests ask for by name.
+
+A fixture is an async function registered with :py:meth:`TestCollector.fixture
+<distest.collector.TestCollector.fixture>`. A test (or another fixture) gets its value by taking a parameter with the
+fixture's name after ``interface``. A fixture that ``yield``\\ s instead of returning is torn down by running the rest
+of it once its scope ends::
+
+    @test_collector.fixture(scope="session")
+    async def scratch_channel(interface):
+        channel = await interface.channel.guild.create_text_channel("scratch")
+        yield channel
+        await channel.delete()
+
+    @test_collector()
+    async def test_something(interface, scratch_channel):
+        ...
+
+The scope decides how long a value is shared for:
+
+* ``function``, the default: set up for every test that uses it, torn down when that test finishes.
+* ``module``: shared by the tests defined in the same module, torn down at the end of the run.
+* ``session``: shared by every test in the run, torn down at the end of the run.
+
+A run is one ``::run`` command or ``--run`` option. The ``interface`` a module or session fixture gets is the one of
+the first test that used it.
+"""
+
+import asyncio
+import inspect
+
+SCOPES = ("function", "module", "session")
+
+
+class Fixture:
+    """ A fixture function and its scope.
+
+    :param str name: The name tests ask for it by
+    :param function func: The function, a coroutine function or an async generator function that yields once
+    :param str scope: One of :py:data:`SCOPES`
+    :raises: ValueError
+    """
+
+    def __init__(self, name, func, scope="function"):
+        if scope not in SCOPES:
+            raise ValueError("{} is not a fixture scope, use one of {}".format(scope, ", ".join(SCOPES)))
+        self.name = name
+        self.func = func
+        self.scope = scope
+
+
+def requested_fixtures(function, skip=1):
+    """ The names of the fixtures a test or fixture function asks for: its parameters after the first ``skip``.
+
+    :param function function: The test or fixture function
+    :param int skip: How many leading parameters aren't fixtures, 1 for a test's ``interface``
+    :rtype: list[str]
+    """
+    return list(inspect.signature(function).parameters)[skip:]
+
+
+class FixtureManager:
+    """ Sets up fixtures as tests ask for them, caches their values for their scope and tears them down.
+
+    :param dict[str,Fixture] fixtures: The fixtures that can be asked for, by name
+    """
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self._values = {}
+        self._teardowns = {scope: [] for scope in SCOPES}
+
+    def _key(self, fixture, test):
+        if fixture.scope == "function":
+            return fixture.name, test.name
+        if fixture.scope == "module":
+            return fixture.name, getattr(test.func, "__module__", None)
+        return fixture.name, None
+
+    async def _resolve(self, name, interface, test, requested_by):
+        if name == "interface":
+            return interface
+        fixture = self.fixtures.get(name)
+        if fixture is None:
+            raise KeyError("{} asks for a fixture called {}, but there isn't one".format(requested_by[-1], name))
+        if name in requested_by:
+            raise RuntimeError("Fixtures depend on each other in a loop: {}".format(" -> ".join(requested_by + [name])))
+        key = self._key(fixture, test)
+        if key not in self._values:
+            # Stored before it's awaited, so tests running in parallel share a single set up
+            self._values[key] = asyncio.ensure_future(self._set_up(fixture, interface, test, requested_by + [name]))
+        return await asyncio.shield(self._values[key])
+
+    async def _set_up(self, fixture, interface, test, requested_by):
+        kwargs = {}
+        for name in requested_fixtures(fixture.func, skip=0):
+            dependency = self.fixtures.get(name)
+            if dependency is not None and SCOPES.index(dependency.scope) < SCOPES.index(fixture.scope):
+                raise ValueError(
+                    "The {} scoped fixture {} can't use the {} scoped fixture {}".format(
+                        fixture.scope, fixture.name, dependency.scope, name
+                    )
+                )
+            kwargs[name] = await self._resolve(name, interface, test, requested_by)
+
+        if inspect.isasyncgenfunction(fixture.func):
+            generator = fixture.func(**kwargs)
+            value = await generator.__anext__()
+            self._teardowns[fixture.scope].append((self._key(fixture, test), generator))
+            return value
+        value = fixture.func(**kwargs)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    async def call(self, test, interface):
+        """ Run a test, with the fixtures it asks for passed in by name after ``interface``.
+
+        :param Test test: The test to run
+        :param TestInterface interface: The interface to pass to it
+        """
+        kwargs = {}
+        for name in requested_fixtures(test.func):
+            kwargs[name] = await self._resolve(name, interface, test, [test.name])
+        await test.func(interface, **kwargs)
+
+    async def teardown(self, scope, test=None):
+        """ Tear down the fixtures of a scope, in the reverse order they were set up. Every fixture is torn down even if
+        some of their teardowns raise, the first error is raised once they all have run.
+
+        :param str scope: The scope to tear down
+        :param Test test: For the ``function`` scope, just tear down the fixtures of this test
+        """
+        remaining = []
+        errors = []
+        teardowns = self._teardowns[scope]
+        # Taken off the list before any of them run, so none are left on it to run again. Tests running in parallel
+        # can add to the new list while these are torn down.
+        self._teardowns[scope] = []
+        for key, generator in reversed(teardowns):
+            if test is not None and key[1] != test.name:
+                remaining.append((key, generator))
+                continue
+            self._values.pop(key, None)
+            try:
+                await generator.__anext__()
+            except StopAsyncIteration:
+                pass
+            except Exception as error:  # The other fixtures of the scope still need tearing down
+                errors.append(error)
+            else:
+                errors.append(RuntimeError("The fixture {} yielded more than once".format(key[0])))
+        self._teardowns[scope][:0] = reversed(remaining)
+        # Fixtures without a teardown are forgotten too
+        for key in [key for key in self._values if self.fixtures[key[0]].scope == scope]:
+            if test is None or key[1] == test.name:
+                del self._values[key]
+        if errors:
+            raise errors[0]
+
+    async def end_run(self):
+        """ Tear down every module and session scoped fixture, at the end of a run. Both scopes are torn down even if
+        the first one raises, the first error is raised once they have. """
+        errors = []
+        for scope in ("module", "session"):
+            try:
+                await self.teardown(scope)
+            except Exception as error:
+                errors.append(error)
+        if errors:
+            raise errors[0]
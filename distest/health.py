@@ -0,0 +1,207 @@
+"""
+Watching the tester's own health during a run, so a wait that timed out because the tester was stuck isn't blamed on
+the target.
+
+A ``wait_for_*`` can time out without the target doing anything wrong: if something blocks the tester's event loop,
+the reply sits unread in the socket until the timeout fires, and a slow gateway connection delivers events late.
+:py:class:`HealthMonitor` runs in the background during every run and samples both: the loop lag, which is how late a
+short sleep wakes up, and the gateway heartbeat latency, :py:attr:`discord.Client.latency`.
+
+When a wait times out, the monitor is asked what happened during it:
+
+* If ``retries`` is set (``--stall-retries``) and the loop stalled or the gateway was slow while waiting, the wait is
+  extended by that long, up to ``retries`` times, before it is given up on. A reply that arrives in the extension
+  passes the test. Waits are never extended by default.
+* Otherwise, the :py:exc:`NoResponseError <distest.exceptions.NoResponseError>` that is raised carries a
+  :py:class:`HealthReport` of the wait as its ``health``, and says in its message whether the tester was healthy.
+"""
+
+import asyncio
+import math
+from collections import deque
+
+from .timing import percentile
+
+
+class HealthReport:
+    """ What the :py:class:`HealthMonitor` saw while a wait was running. All values are in seconds.
+
+    :param float waited: How long the wait ran for, extensions included
+    :param float stalled: How long the event loop was stalled for during the wait
+    :param float max_lag: The worst loop lag seen during the wait
+    :param Optional[float] max_latency: The worst gateway latency seen during the wait, ``None`` if it wasn't known
+    :param int extensions: How many times the wait was extended because of stalls
+    """
+
+    __slots__ = ("waited", "stalled", "max_lag", "max_latency", "extensions")
+
+    def __init__(self, waited, stalled, max_lag, max_latency, extensions=0):
+        self.waited = waited
+        self.stalled = stalled
+        self.max_lag = max_lag
+        self.max_latency = max_latency
+        self.extensions = extensions
+
+    def to_dict(self):
+        """ The report as a plain dict, for the reporters
+
+        :rtype: dict
+        """
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __str__(self):
+        text = "no response after {:.2f} s".format(self.waited)
+        if self.extensions:
+            text += ", extended {} time(s) for stalls".format(self.extensions)
+        text += "; worst loop lag {:.0f} ms".format(self.max_lag * 1000)
+        if self.stalled:
+            text += ", loop stalled for {:.0f} ms".format(self.stalled * 1000)
+        if self.max_latency is not None:
+            text += ", gateway latency up to {:.0f} ms".format(self.max_latency * 1000)
+        return text
+
+
+class HealthMonitor:
+    """ Samples event loop lag and gateway latency in the background, see the module documentation.
+
+    Installed on :py:class:`DiscordBot <distest.bot.DiscordBot>` as ``health``, and started and stopped around each
+    run.
+
+    :param float interval: Seconds between samples
+    :param float stall_threshold: Loop lag at or above this many seconds counts as a stall
+    :param float latency_threshold: Gateway latency above this many seconds counts as a stall, for as much as it is
+                                    above the threshold
+    :param int retries: How many times a wait that timed out during a stall is extended, by default 0: never
+    :param int max_samples: How many of the most recent samples to keep
+    """
+
+    def __init__(self, interval=0.1, stall_threshold=0.1, latency_threshold=1.0, retries=0, max_samples=6000):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.latency_threshold = latency_threshold
+        self.retries = retries
+        #: ``(loop time, lag, gateway latency)`` of the most recent samples
+        self.samples = deque(maxlen=max_samples)
+        #: How many waits were extended because of a stall
+        self.extended = 0
+        #: Called with the loop lag of every sample as it is taken, e.g. by :py:class:`RunProfiler
+        #: <distest.profiling.RunProfiler>`, so nothing else needs to measure it again
+        self.listeners = []
+        self._client = None
+        self._task = None
+
+    def start(self, client):
+        """ Start sampling. Does nothing if already started.
+
+        :param discord.Client client: The client whose gateway latency to sample
+        """
+        if self._task is not None:
+            return
+        self._client = client
+        # The first sleep is timed from now, not from when the task first runs, so a stall right at the start of a run
+        # is measured too
+        self._task = asyncio.ensure_future(self._watch(asyncio.get_event_loop().time()))
+
+    def stop(self):
+        """ Stop sampling, the samples are kept """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _latency(self):
+        latency = getattr(self._client, "latency", None)
+        if latency is None or math.isnan(latency) or math.isinf(latency):
+            return None  # Not connected to a real gateway, or no heartbeat yet
+        return latency
+
+    async def _watch(self, started):
+        loop = asyncio.get_event_loop()
+        expected = started + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, expected - loop.time()))
+            now = loop.time()
+            lag = max(0.0, now - expected)
+            self.samples.append((now, lag, self._latency()))
+            for listener in self.listeners:
+                listener(lag)
+            expected = loop.time() + self.interval
+
+    def _window(self, start, end):
+        """ The samples taken since ``start`` whose sleep began before ``end``, newest first """
+        for sample in reversed(self.samples):
+            if sample[0] < start:
+                break
+            if sample[0] - sample[1] - self.interval <= end:
+                yield sample
+
+    def stalled(self, start, end):
+        """ How many seconds of the time between ``start`` and ``end`` the tester was stalled for: the loop lag of
+        every stall that overlapped it, plus how far the gateway latency went over ``latency_threshold``.
+
+        :param float start: The loop time the wait started
+        :param float end: The loop time the wait ended
+        :rtype: float
+        """
+        stalled = 0.0
+        worst_latency = 0.0
+        for time, lag, latency in self._window(start, end):
+            if lag >= self.stall_threshold:
+                stalled += max(0.0, min(time, end) - max(time - lag, start))
+            if latency is not None:
+                worst_latency = max(worst_latency, latency)
+        return stalled + max(0.0, worst_latency - self.latency_threshold)
+
+    def extension(self, start, end, timeout):
+        """ How much longer a wait that just timed out should keep going for, because the tester was stalled while it
+        was waiting. A timeout that fired late counts too, as the loop was blocked right when the wait ended.
+
+        :param float start: The loop time the wait (or its last extension) started
+        :param float end: The loop time the wait timed out
+        :param float timeout: What the wait's timeout was
+        :return: The seconds to extend the wait by, 0 to give up
+        :rtype: float
+        """
+        overshoot = end - start - timeout
+        stalled = self.stalled(start, end)
+        if overshoot >= self.stall_threshold:
+            stalled = max(stalled, overshoot)
+        return stalled
+
+    def report(self, start, end, extensions=0):
+        """ Describe the health of the tester between ``start`` and ``end``.
+
+        :param float start: The loop time the wait started
+        :param float end: The loop time the wait ended
+        :param int extensions: How many times the wait was extended
+        :rtype: HealthReport
+        """
+        window = list(self._window(start, end))
+        latencies = [latency for _, _, latency in window if latency is not None]
+        return HealthReport(
+            end - start,
+            self.stalled(start, end),
+            max((lag for _, lag, _ in window), default=0.0),
+            max(latencies) if latencies else None,
+            extensions,
+        )
+
+    def format(self):
+        """ Summarise every sample in a few lines, ready to send in a code block. Empty if there are no samples.
+
+        :rtype: str
+        """
+        if not self.samples:
+            return ""
+        lags = [lag for _, lag, _ in self.samples]
+        stalls = sum(1 for lag in lags if lag >= self.stall_threshold)
+        text = "loop lag p50 {:.0f} ms, p99 {:.0f} ms, max {:.0f} ms, {} stall(s)\n".format(
+            percentile(lags, 50) * 1000, percentile(lags, 99) * 1000, max(lags) * 1000, stalls
+        )
+        latencies = [latency for _, _, latency in self.samples if latency is not None]
+        if latencies:
+            text += "gateway latency p50 {:.0f} ms, max {:.0f} ms\n".format(
+                percentile(latencies, 50) * 1000, max(latencies) * 1000
+            )
+        if self.extended:
+            text += "{} wait(s) extended because of stalls\n".format(self.extended)
+        return text
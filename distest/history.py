@@ -0,0 +1,104 @@
+"""
+A persistent record of every test result, kept in a local SQLite database.
+
+Test results normally only live as long as the tester process, so ``::run failed`` and ``::run unrun`` forget
+everything on a restart and ``--stats`` has nothing to show. :py:class:`RunHistory` stores each result along with a
+hash of the test function's source code. When the tester starts, the last result of every test whose code hasn't
+changed since is put back on the test. Tests that are new or whose code changed start out unrun, which makes
+``--run changed`` (everything that hasn't passed with its current code) a quick way to check just what a change
+touched.
+"""
+
+import hashlib
+import inspect
+import sqlite3
+
+from .TestInterface import TestResult
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    name TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    result TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS results_name ON results (name);
+"""
+
+
+def source_hash(function):
+    """ Hash the source code of a test function, falling back to its bytecode if the source can't be found.
+
+    :param function function: The test function
+    :rtype: str
+    """
+    try:
+        source = inspect.getsource(function).encode("utf-8")
+    except (OSError, TypeError):
+        code = getattr(function, "__code__", None)
+        source = code.co_code if code is not None else repr(function).encode("utf-8")
+    return hashlib.sha1(source).hexdigest()
+
+
+class RunHistory:
+    """ The results of every test run, stored in SQLite.
+
+    :param str path: The database file, created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        self._hashes = {}
+
+    def _hash(self, test):
+        if test.name not in self._hashes:
+            self._hashes[test.name] = source_hash(test.func)
+        return self._hashes[test.name]
+
+    def restore(self, tests):
+        """ Put the last recorded result, run time and duration back on each test whose source hasn't changed since.
+
+        :param tests: The tests to restore
+        :type tests: Iterable[Test]
+        """
+        latest = {
+            name: (source, result, started, duration)
+            for name, source, result, started, duration in self._db.execute(
+                "SELECT name, source_hash, result, started, duration FROM results "
+                "WHERE rowid IN (SELECT MAX(rowid) FROM results GROUP BY name)"
+            )
+        }
+        for test in tests:
+            if test.name not in latest:
+                continue
+            source, result, started, duration = latest[test.name]
+            if source == self._hash(test):
+                test.result = TestResult[result.upper()]
+                test.last_run = started
+                test.duration = duration
+
+    def record(self, test):
+        """ Store the result of a test that just ran.
+
+        :param Test test: The test that just finished
+        """
+        self._db.execute(
+            "INSERT INTO results (name, source_hash, result, started, duration, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                test.name,
+                self._hash(test),
+                test.result.name.lower(),
+                test.last_run,
+                test.duration,
+                None if test.error is None else "{}: {}".format(type(test.error).__name__, test.error),
+            ),
+        )
+        self._db.commit()
+
+    def close(self):
+        """ Close the database """
+        self._db.close()
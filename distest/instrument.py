@@ -0,0 +1,189 @@
+"""
+Timing the target bot from the inside, so the latency of a reply can be split into the target's own processing and
+the time spent going through Discord.
+
+The tester only sees round trips: from its trigger message being sent to the reply arriving. Put
+:py:func:`instrument_target` in the **target bot**, next to :py:func:`patch_target <distest.patches.patch_target>`,
+and it writes down how long the target took from receiving each message to making its first request to Discord about
+it (sending a reply, reacting, ...). The timings go to a local file, one JSON object per line, which the tester reads
+with :py:class:`TargetTimings` when it is run with ``--target-timings`` pointing at the same file. Each assertion that
+sent a trigger then gets a ``processing`` time, and the stats show how much of each kind of wait was the target and
+how much was Discord.
+
+Requests are matched to the message that caused them by a :py:mod:`contextvars` variable that is set while the
+message is dispatched, so it follows every handler task and command the message starts, however the target is
+structured. The tester and target must be able to open the same file, so both need to run on the same machine.
+
+Usage
+*****
+
+.. code-block:: python
+
+    bot = commands.Bot(command_prefix='$')
+
+    if sys.argv[2] == "TESTING":
+        from distest.patches import patch_target
+        from distest.instrument import instrument_target
+        bot = instrument_target(patch_target(bot), "target-timings.jsonl")
+"""
+
+import contextvars
+import json
+import os
+import time
+
+from discord.http import Route
+
+from .timing import PERCENTILES, percentile
+
+#: The events that count as a message being received, and how to get the message's ID out of their arguments
+TRIGGER_EVENTS = {
+    "message": lambda message: message.id,
+    "message_edit": lambda before, after: after.id,
+}
+
+_trigger = contextvars.ContextVar("distest_trigger", default=None)
+
+
+class _Trigger:
+    """ A message being handled by the target, and whether a request has been timed for it yet """
+
+    __slots__ = ("message_id", "event", "received", "reported")
+
+    def __init__(self, message_id, event):
+        self.message_id = message_id
+        self.event = event
+        self.received = time.perf_counter()
+        self.reported = False
+
+
+def instrument_target(client, path):
+    """ Time how long ``client`` takes to respond to each message it receives, writing the timings to ``path``.
+
+    Call this before the client connects. Only the first request made because of each message is written down, as
+    that is what the tester's waits see first.
+
+    :param discord.Client client: The target bot
+    :param str path: The file to append the timings to, the tester reads it with :py:class:`TargetTimings`
+    :return: The instrumented client
+    :rtype: discord.Client
+    """
+    file = open(path, "a", encoding="utf-8")
+    dispatch = client.dispatch
+    request = client.http.request
+
+    def instrumented_dispatch(event, *args, **kwargs):
+        message_id = None
+        if event in TRIGGER_EVENTS:
+            try:
+                message_id = TRIGGER_EVENTS[event](*args)
+            except (AttributeError, TypeError):
+                pass
+        if message_id is None:
+            return dispatch(event, *args, **kwargs)
+        # Every task the handlers start copies the context, and the trigger along with it
+        token = _trigger.set(_Trigger(message_id, event))
+        try:
+            return dispatch(event, *args, **kwargs)
+        finally:
+            _trigger.reset(token)
+
+    async def instrumented_request(route, **kwargs):
+        trigger = _trigger.get()
+        if trigger is not None and not trigger.reported and route.method != "GET":
+            trigger.reported = True
+            record = {
+                "trigger": trigger.message_id,
+                "event": trigger.event,
+                "processing": time.perf_counter() - trigger.received,
+                "request": "{} {}".format(route.method, route.url[len(Route.BASE):]),
+            }
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+        return await request(route, **kwargs)
+
+    client.dispatch = instrumented_dispatch
+    # The connection state keeps its own reference to the dispatch method it was created with
+    client._connection.dispatch = instrumented_dispatch
+    client.http.request = instrumented_request
+    return client
+
+
+class TargetTimings:
+    """ Reads the timings written by :py:func:`instrument_target`, as the target writes them.
+
+    Installed on :py:class:`DiscordBot <distest.bot.DiscordBot>` as ``target_timings``, which calls
+    :py:meth:`annotate` on every test that finishes.
+
+    :param str path: The file the target writes its timings to. It doesn't have to exist yet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offset = 0
+        self._processing = {}
+
+    def poll(self):
+        """ Read the timings the target has written since the last call """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as file:
+            file.seek(self._offset)
+            while True:
+                line = file.readline()
+                if not line.endswith("\n"):
+                    break  # Not written completely yet, read it next time
+                self._offset = file.tell()
+                if line.strip():
+                    record = json.loads(line)
+                    self._processing[record["trigger"]] = record["processing"]
+
+    def processing(self, message_id):
+        """ How long the target took to respond to a message, in seconds, or ``None`` if it hasn't reported it.
+
+        :param int message_id: The ID of the trigger message
+        :rtype: Optional[float]
+        """
+        return self._processing.get(message_id)
+
+    def annotate(self, timings):
+        """ Set the ``processing`` time of every timing whose trigger the target has reported on.
+
+        :param list[AssertionTiming] timings: The timings of a test that just finished
+        """
+        self.poll()
+        for timing in timings:
+            if timing.trigger_id is not None:
+                timing.processing = self._processing.get(timing.trigger_id)
+
+
+def format_split(tests):
+    """ Split the latency of each assertion kind into the target's processing and the transport through Discord, as
+    percentiles in milliseconds, ready to send in a code block. Only timings the target reported on are counted.
+    Empty if there are none.
+
+    :param tests: The tests to report on
+    :type tests: Iterable[Test]
+    :rtype: str
+    """
+    split = {}
+    for test in tests:
+        for timing in test.timings:
+            if timing.latency is None or timing.processing is None:
+                continue
+            processing, transport = split.setdefault(timing.kind, ([], []))
+            processing.append(timing.processing)
+            transport.append(max(0.0, timing.latency - timing.processing))
+    if not split:
+        return ""
+    width = max(len("assertion"), max(map(len, split)))
+    header = "assertion".rjust(width) + "      part"
+    header += "".join(" {:>7}".format("p{}".format(pct)) for pct in PERCENTILES)
+    lines = [header + " (ms)"]
+    for kind, parts in sorted(split.items()):
+        for name, values in zip(("target", "discord"), parts):
+            line = (kind if name == "target" else "").rjust(width) + " {:>9}".format(name)
+            for pct in PERCENTILES:
+                line += " {:>7.0f}".format(percentile(values, pct) * 1000)
+            lines.append(line)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,259 @@
+"""
+Load testing: running ordinary tests as scenarios, by many virtual users at once, to see how the target holds up under
+traffic.
+
+:py:class:`LoadRunner` starts scenarios at a steady rate for a set time. Each one is a run of a test from the
+collector, picked round robin, by a virtual user with its own :py:class:`TestInterface
+<distest.TestInterface.TestInterface>` in one of the run's channels. The tests use the usual ``assert_reply_*`` and
+``wait_for_*`` calls, so any correctness test that can run in parallel is a load scenario too. Serial tests, tests
+that need a human and tests that depend on other tests are left out.
+
+There are only so many virtual users, so when a scenario is due and they are all busy, it is dropped and counted,
+rather than queued: the target falling behind shows up as drops instead of as ever growing latency. Virtual users are
+spread evenly over the channels, and users that share a channel may pick up each other's replies, so use at least as
+many channels as users for scenarios whose replies can be told apart only by channel.
+
+:py:class:`LoadReport` collects the throughput, error rate, latency percentiles and a latency histogram of every
+assertion kind.
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter
+
+from .TestInterface import Test, TestInterface
+from .timing import PERCENTILES, percentile
+
+#: Upper bounds of the latency histogram buckets, in seconds. Latencies above the last one are counted in an extra
+#: bucket.
+HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LoadReport:
+    """ The results of a load run. """
+
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.throttled = 0.0
+        #: Seconds from the first scenario starting to the last one finishing
+        self.elapsed = 0.0
+        #: ``{test name: [passed, failed]}``
+        self.scenarios = {}
+        #: How often each type of error was raised
+        self.errors = Counter()
+        #: ``{assertion kind: [latency, ...]}``
+        self.latencies = {}
+
+    def record(self, test_name, timings, error=None):
+        """ Add a finished scenario to the report.
+
+        :param str test_name: The test the scenario ran
+        :param list[AssertionTiming] timings: The timings its assertions recorded
+        :param Exception error: What it raised, if it failed
+        """
+        counts = self.scenarios.setdefault(test_name, [0, 0])
+        if error is None:
+            self.passed += 1
+            counts[0] += 1
+        else:
+            self.failed += 1
+            counts[1] += 1
+            self.errors[type(error).__name__] += 1
+        for timing in timings:
+            self.throttled += timing.throttled
+            if timing.latency is not None:
+                self.latencies.setdefault(timing.kind, []).append(timing.latency)
+
+    @property
+    def completed(self):
+        """ How many scenarios ran to the end, passing or failing
+
+        :rtype: int
+        """
+        return self.passed + self.failed
+
+    @property
+    def throughput(self):
+        """ Scenarios completed per second
+
+        :rtype: float
+        """
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self):
+        """ The fraction of the completed scenarios that failed
+
+        :rtype: float
+        """
+        return self.failed / self.completed if self.completed else 0.0
+
+    @staticmethod
+    def histogram(latencies):
+        """ Count ``latencies`` into the :py:data:`HISTOGRAM_BUCKETS`.
+
+        :param list[float] latencies: The latencies, in seconds
+        :return: The count of each bucket, and one more for everything above the last bucket
+        :rtype: list[int]
+        """
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for latency in latencies:
+            for index, bound in enumerate(HISTOGRAM_BUCKETS):
+                if latency <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def to_dict(self):
+        """ The whole report as a plain dict, with times in seconds.
+
+        :rtype: dict
+        """
+        return {
+            "elapsed": self.elapsed,
+            "passed": self.passed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "throughput": self.throughput,
+            "error_rate": self.error_rate,
+            "throttled": self.throttled,
+            "errors": dict(self.errors),
+            "scenarios": {name: {"passed": counts[0], "failed": counts[1]} for name, counts in self.scenarios.items()},
+            "buckets": list(HISTOGRAM_BUCKETS),
+            "assertions": {
+                kind: dict(
+                    count=len(values),
+                    histogram=self.histogram(values),
+                    **{"p{}".format(pct): percentile(values, pct) for pct in PERCENTILES}
+                )
+                for kind, values in sorted(self.latencies.items())
+            },
+        }
+
+    def save(self, path):
+        """ Write :py:meth:`to_dict` to ``path`` as JSON
+
+        :param str path: The file to write to, overwritten if it exists
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def format(self):
+        """ Format the report as text, with latencies in milliseconds and a bar chart of each histogram.
+
+        :rtype: str
+        """
+        lines = [
+            "{} scenarios in {:.1f} s: {:.2f}/s, {:.1%} failed, {} dropped".format(
+                self.completed, self.elapsed, self.throughput, self.error_rate, self.dropped
+            )
+        ]
+        if self.throttled:
+            lines.append("held back {:.1f} s by rate limits".format(self.throttled))
+        if self.errors:
+            lines.append("errors: " + ", ".join("{} x{}".format(name, n) for name, n in self.errors.most_common()))
+        width = max(map(len, self.scenarios), default=0)
+        for name, (passed, failed) in self.scenarios.items():
+            lines.append("{} {:>6} passed {:>6} failed".format(name.rjust(width), passed, failed))
+        labels = ["<= {:g}".format(bound * 1000) for bound in HISTOGRAM_BUCKETS]
+        labels.append(" > {:g}".format(HISTOGRAM_BUCKETS[-1] * 1000))
+        for kind, values in sorted(self.latencies.items()):
+            lines.append("")
+            lines.append(
+                "{} x{}: ".format(kind, len(values))
+                + ", ".join("p{} {:.0f}".format(pct, percentile(values, pct) * 1000) for pct in PERCENTILES)
+                + " (ms)"
+            )
+            counts = self.histogram(values)
+            for label, count in zip(labels, counts):
+                if count:
+                    bar = "#" * max(1, round(40 * count / len(values)))
+                    lines.append("  {:>8} ms {:>6} {}".format(label, count, bar))
+        return "\n".join(lines) + "\n"
+
+
+class LoadRunner:
+    """ Runs tests as load scenarios, see the module documentation.
+
+    :param float rate: How many scenarios to start every second
+    :param float duration: How many seconds to keep starting scenarios for. The ones still running at the end are
+                           waited for.
+    :param int users: How many scenarios can run at the same time, defaults to one per channel
+    :param bool poisson: Start scenarios at random, exponentially distributed intervals averaging ``rate``, like
+                         independent users would, instead of at exactly ``1 / rate`` apart
+    """
+
+    def __init__(self, rate, duration=60.0, users=None, poisson=False):
+        if rate <= 0:
+            raise ValueError("The rate of a load run must be more than 0")
+        self.rate = rate
+        self.duration = duration
+        self.users = users
+        self.poisson = poisson
+
+    async def _scenario(self, client, test, number, channel, target, report):
+        # A copy of the test for each scenario, so function scoped fixtures aren't shared between scenarios
+        scenario = Test("{}#{}".format(test.name, number), test.func, tags=test.tags)
+        interface = TestInterface(client, channel, target, test)
+        error = None
+        try:
+            if client.fixtures is not None:
+                try:
+                    await client.fixtures.call(scenario, interface)
+                finally:
+                    await client.fixtures.teardown("function", scenario)
+            else:
+                await test.func(interface)
+        except Exception as exc:  # Under load, a test crashing is as much of a result as an assertion failing
+            error = exc
+        report.record(test.name, interface.timings, error)
+
+    async def run(self, client, tests, channels):
+        """ Run a load test.
+
+        :param DiscordBot client: The tester
+        :param list[Test] tests: The tests to use as scenarios, run round robin
+        :param list[discord.TextChannel] channels: The channels to spread the virtual users over
+        :rtype: LoadReport
+        """
+        loop = asyncio.get_event_loop()
+        report = LoadReport()
+        target = client._find_target(channels[0].guild)
+        users = self.users or len(channels)
+        free_channels = [channels[user % len(channels)] for user in range(users)]
+        running = set()
+
+        def scenario_finished(task, channel):
+            running.discard(task)
+            free_channels.append(channel)
+
+        started = loop.time()
+        due = started
+        number = 0
+        while due < started + self.duration:
+            if due > loop.time():
+                await asyncio.sleep(due - loop.time())
+            if not free_channels:
+                report.dropped += 1
+            else:
+                if client.send_scheduler is not None:
+                    channel = client.send_scheduler.pick_channel(free_channels)
+                else:
+                    channel = free_channels[0]
+                free_channels.remove(channel)
+                task = asyncio.ensure_future(
+                    self._scenario(client, tests[number % len(tests)], number, channel, target, report)
+                )
+                task.add_done_callback(lambda task, channel=channel: scenario_finished(task, channel))
+                running.add(task)
+            number += 1
+            due += random.expovariate(self.rate) if self.poisson else 1 / self.rate
+        if running:
+            await asyncio.wait(list(running))
+        report.elapsed = loop.time() - started
+        return report
@@ -0,0 +1,496 @@
+"""
+An in-process stand-in for Discord, used to run test suites with no network connection, tokens or live guild.
+
+:py:class:`FakeDiscord` simulates a single guild with text channels, members, messages, reactions, embeds,
+attachments and channel create/delete. Any number of :py:class:`discord.Client` objects (the tester and the target)
+can be attached to it, they all share one event loop. Each attached client gets its HTTP client swapped for a
+:py:class:`FakeHTTPClient`, and instead of a gateway connection the backend feeds event payloads straight into the
+client's own parsers, so the client builds the same ``discord.Message``, ``discord.Reaction``, etc. objects it would
+when talking to the real thing.
+
+From the command line, pass ``--offline module:client`` to :py:func:`run_dtest_bot <distest.run_dtest_bot>`, where
+``module:client`` is the import path of the target bot's client::
+
+    python example_tester.py 1 --offline example_target:client -c 2 -r all
+"""
+
+import asyncio
+import copy
+import datetime
+import importlib
+import json
+import re
+import time
+from urllib.parse import unquote
+
+import discord
+from discord.http import HTTPClient, Route
+
+DISCORD_EPOCH = 1420070400000
+
+IMAGE_URL = re.compile(r"^https?://\S+\.(?:png|jpe?g|gif|webp)$", re.IGNORECASE)
+
+
+def _link_embed(url):
+    return {"type": "image", "url": url, "thumbnail": {"url": url}}
+
+
+def load_client(spec):
+    """ Import a ``discord.Client`` from a ``module:attribute`` path. The attribute defaults to ``client``.
+
+    :param str spec: The import path, e.g. ``example_target:client``
+    :rtype: discord.Client
+    """
+    module_name, _, attribute = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "client")
+
+
+def deliver_event(client, event, data):
+    """ Hand a gateway event to ``client`` the way its websocket would: dispatch the raw ``socket_response``, then
+    parse it.
+
+    :param discord.Client client: The client to deliver the event to
+    :param str event: The name of the gateway event, e.g. ``MESSAGE_CREATE``
+    :param dict data: The payload of the event
+    """
+    client.dispatch("socket_response", {"op": 0, "t": event, "d": data})
+    client._connection.parsers[event](data)
+
+
+class FakeHTTPClient(HTTPClient):
+    """ A :py:class:`discord.http.HTTPClient` that hands every request to a :py:class:`FakeDiscord` instead of
+    sending it over the network.
+
+    :param FakeDiscord backend: The backend to send requests to
+    :param int user_id: The ID of the user this client is logged in as
+    """
+
+    def __init__(self, backend, user_id, loop=None):
+        super().__init__(loop=loop)
+        self._backend = backend
+        self._user_id = user_id
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        return await self._backend.handle(self._user_id, route, form=form, **kwargs)
+
+    async def static_login(self, token, *, bot):
+        self._token(token, bot=bot)
+        return self._backend.users[self._user_id]
+
+    async def close(self):
+        self._backend._closed(self._user_id)
+
+
+class FakeDiscord:
+    """ A fake Discord, holding one guild that attached clients can talk to each other through.
+
+    :param str guild_name: The name of the simulated guild
+    :param float latency: How many seconds events take to be "delivered" to clients. Defaults to 0, which still
+                          delivers them on a later loop iteration, just like a real gateway would.
+    :param float embed_delay: How many seconds after a message that is an image link is sent its embed is added, with
+                              an edit, like Discord does. ``None`` adds it to the message straight away.
+    """
+
+    def __init__(self, guild_name="distest", latency=0, embed_delay=0.2):
+        self.latency = latency
+        self.embed_delay = embed_delay
+        self._last_id = 0
+        self._clients = {}
+        self._closed_events = {}
+        self._routes = [
+            ("GET", "/users/@me", self._get_me),
+            ("POST", "/channels/{channel_id}/messages", self._send_message),
+            ("GET", "/channels/{channel_id}/messages", self._get_messages),
+            ("GET", "/channels/{channel_id}/messages/{message_id}", self._get_message),
+            ("PATCH", "/channels/{channel_id}/messages/{message_id}", self._edit_message),
+            ("DELETE", "/channels/{channel_id}/messages/{message_id}", self._delete_message),
+            ("PUT", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self._add_reaction),
+            ("DELETE", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self._remove_reaction),
+            ("POST", "/channels/{channel_id}/typing", self._typing),
+            ("GET", "/channels/{channel_id}", self._get_channel),
+            ("DELETE", "/channels/{channel_id}", self._delete_channel),
+            ("POST", "/guilds/{guild_id}/channels", self._create_channel),
+            ("GET", "/guilds/{guild_id}/channels", self._get_channels),
+        ]
+
+        self.users = {}
+        self.channels = {}
+        self.messages = {}
+        self.guild_id = self.next_id()
+        self.guild = {
+            "id": str(self.guild_id),
+            "name": guild_name,
+            "owner_id": None,
+            "region": "us-west",
+            "afk_timeout": 300,
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "features": [],
+            "mfa_level": 0,
+            "premium_tier": 0,
+            "roles": [
+                {
+                    "id": str(self.guild_id),
+                    "name": "@everyone",
+                    "position": 0,
+                    "permissions": str(discord.Permissions.all().value),
+                    "color": 0,
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                }
+            ],
+            "emojis": [],
+            "members": [],
+            "presences": [],
+            "voice_states": [],
+            "member_count": 0,
+            "large": False,
+            "unavailable": False,
+        }
+        self.default_channel_id = self.add_text_channel("general")
+
+    def next_id(self):
+        """ Generate a new snowflake ID, always larger than the last one.
+
+        :rtype: int
+        """
+        snowflake = (int(time.time() * 1000) - DISCORD_EPOCH) << 22
+        self._last_id = max(snowflake, self._last_id + 1)
+        return self._last_id
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    # Guild contents
+
+    def add_text_channel(self, name, channel_id=None):
+        """ Add a text channel to the guild without sending any events, for setting the guild up before clients
+        connect.
+
+        :param str name: The name of the channel
+        :param int channel_id: The ID of the channel, generated if not given
+        :return: The ID of the channel
+        :rtype: int
+        """
+        channel_id = channel_id or self.next_id()
+        data = {
+            "id": str(channel_id),
+            "type": discord.ChannelType.text.value,
+            "guild_id": str(self.guild_id),
+            "name": name,
+            "position": len(self.channels),
+            "permission_overwrites": [],
+            "nsfw": False,
+            "parent_id": None,
+            "topic": None,
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+        }
+        self.channels[channel_id] = data
+        return channel_id
+
+    def add_user(self, name, user_id=None, bot=True):
+        """ Add a member to the guild without sending any events.
+
+        :param str name: The username of the member
+        :param int user_id: The ID of the member, generated if not given
+        :param bool bot: Whether or not the member is a bot account
+        :return: The ID of the user
+        :rtype: int
+        """
+        user_id = user_id or self.next_id()
+        user = {
+            "id": str(user_id),
+            "username": name,
+            "discriminator": "{:04}".format(len(self.users) + 1),
+            "avatar": None,
+            "bot": bot,
+        }
+        self.users[user_id] = user
+        self.guild["members"].append(self._member(user_id))
+        self.guild["presences"].append(
+            {"user": {"id": str(user_id)}, "status": "online", "activities": [], "client_status": {}}
+        )
+        self.guild["member_count"] = len(self.guild["members"])
+        if self.guild["owner_id"] is None:
+            self.guild["owner_id"] = str(user_id)
+        return user_id
+
+    def _member(self, user_id):
+        return {
+            "user": self.users[user_id],
+            "roles": [],
+            "joined_at": self._now(),
+            "deaf": False,
+            "mute": False,
+            "nick": None,
+        }
+
+    # Clients
+
+    def attach(self, client, name=None, user_id=None):
+        """ Attach a client to the backend, logging it in as a new member of the guild.
+
+        Must be called before :py:meth:`start`.
+
+        :param discord.Client client: The client to attach
+        :param str name: The username to give the client, defaults to the class name
+        :param int user_id: The user ID to give the client, generated if not given
+        :return: The ID of the client's user
+        :rtype: int
+        """
+        user_id = self.add_user(name or type(client).__name__, user_id)
+        http = FakeHTTPClient(self, user_id, loop=client.loop)
+        client.http = http
+        client._connection.http = http
+        self._clients[user_id] = client
+        return user_id
+
+    def _connect(self, user_id, client):
+        """ Do what a READY + GUILD_CREATE from the gateway would do for ``client`` """
+        guild = copy.deepcopy(dict(self.guild, channels=list(self.channels.values())))
+        ready = {"user": copy.deepcopy(self.users[user_id]), "guilds": [{"id": guild["id"], "unavailable": True}]}
+        client.dispatch("socket_response", {"op": 0, "t": "READY", "d": copy.deepcopy(ready)})
+        client.dispatch("socket_response", {"op": 0, "t": "GUILD_CREATE", "d": copy.deepcopy(guild)})
+
+        state = client._connection
+        state.clear()
+        state.user = discord.ClientUser(state=state, data=ready["user"])
+        state._users[state.user.id] = state.user
+        state._add_guild_from_data(guild)
+        self._closed_events[user_id] = asyncio.Event()
+        client._closed = False
+        state.dispatch("connect")
+        state.call_handlers("ready")
+        state.dispatch("ready")
+
+    def _closed(self, user_id):
+        if user_id in self._closed_events:
+            self._closed_events[user_id].set()
+
+    async def start(self, main_client, *others):
+        """ Connect every attached client and wait until ``main_client`` closes, then close the others.
+
+        The other clients (normally the target bot) are connected first, so they are ready by the time
+        ``main_client`` (normally the tester) gets its ``on_ready``.
+
+        :param discord.Client main_client: The client whose closing ends the run
+        :param discord.Client others: Every other client to run
+        """
+        ids = {client: user_id for user_id, client in self._clients.items()}
+        for client in others + (main_client,):
+            self._connect(ids[client], client)
+        await self._closed_events[ids[main_client]].wait()
+        for client in others:
+            await client.close()
+
+    def run(self, main_client, *others):
+        """ Blocking version of :py:meth:`start`, the offline equivalent of :py:meth:`discord.Client.run`.
+
+        :param discord.Client main_client: The client whose closing ends the run
+        :param discord.Client others: Every other client to run
+        """
+        main_client.loop.run_until_complete(self.start(main_client, *others))
+
+    # Events
+
+    def emit(self, event, data):
+        """ Send a gateway event to every connected client.
+
+        :param str event: The name of the gateway event, e.g. ``MESSAGE_CREATE``
+        :param dict data: The payload of the event, each client gets its own copy
+        """
+        for user_id, client in self._clients.items():
+            if user_id not in self._closed_events or client.is_closed():
+                continue
+            client.loop.call_later(self.latency, deliver_event, client, event, copy.deepcopy(data))
+
+    # HTTP
+
+    async def handle(self, user_id, route, form=None, json=None, params=None, **kwargs):
+        """ Answer an HTTP request from one of the attached clients.
+
+        :param int user_id: The user making the request
+        :param discord.http.Route route: The route being requested
+        :raises: NotImplementedError if the route isn't simulated
+        """
+        path = route.url[len(Route.BASE):]
+        for method, template, handler in self._routes:
+            if method != route.method:
+                continue
+            match = re.fullmatch(re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", template), path)
+            if match:
+                arguments = {key: unquote(value) for key, value in match.groupdict().items()}
+                for key in ("channel_id", "message_id", "guild_id"):
+                    if key in arguments:
+                        arguments[key] = int(arguments[key])
+                if form is not None:
+                    json = self._parse_form(form)
+                return handler(user_id, payload=json or {}, params=params or {}, **arguments)
+        raise NotImplementedError("The offline backend doesn't support {} {}".format(route.method, path))
+
+    @staticmethod
+    def _parse_form(form):
+        payload = {"attachments": []}
+        for part in form:
+            if part["name"] == "payload_json":
+                payload.update(json.loads(part["value"]))
+            else:
+                content = part["value"].read()
+                payload["attachments"].append({"filename": part["filename"], "size": len(content)})
+        return payload
+
+    def _channel(self, channel_id):
+        if channel_id not in self.channels:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Channel")
+        return self.channels[channel_id]
+
+    def _stored_message(self, channel_id, message_id):
+        self._channel(channel_id)
+        if message_id not in self.messages:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Message")
+        return self.messages[message_id]
+
+    def _get_me(self, user_id, **kwargs):
+        return self.users[user_id]
+
+    def _send_message(self, user_id, channel_id, payload, **kwargs):
+        self._channel(channel_id)
+        message_id = self.next_id()
+        content = payload.get("content") or ""
+        embeds = [payload["embed"]] if payload.get("embed") else []
+        if IMAGE_URL.match(content):
+            if self.embed_delay is None:
+                embeds.append(_link_embed(content))
+            else:
+                asyncio.get_event_loop().call_later(self.embed_delay, self._add_link_embed, message_id)
+        attachments = [
+            {
+                "id": str(self.next_id()),
+                "filename": attachment["filename"],
+                "size": attachment["size"],
+                "url": "https://cdn.discordapp.com/attachments/{}/{}/{}".format(
+                    channel_id, message_id, attachment["filename"]
+                ),
+                "proxy_url": "",
+            }
+            for attachment in payload.get("attachments", [])
+        ]
+        message = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": str(self.guild_id),
+            "author": self.users[user_id],
+            "member": self._member(user_id),
+            "content": content,
+            "timestamp": self._now(),
+            "edited_timestamp": None,
+            "tts": payload.get("tts", False),
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": attachments,
+            "embeds": embeds,
+            "pinned": False,
+            "type": 0,
+        }
+        if payload.get("message_reference"):
+            message["message_reference"] = payload["message_reference"]
+        self.messages[message_id] = message
+        self.channels[channel_id]["last_message_id"] = str(message_id)
+        self.emit("MESSAGE_CREATE", message)
+        return copy.deepcopy(message)
+
+    def _add_link_embed(self, message_id):
+        message = self.messages.get(message_id)
+        if message is None or not IMAGE_URL.match(message["content"]):
+            return  # Deleted, or edited into something else, in the meantime
+        message["embeds"].append(_link_embed(message["content"]))
+        self.emit("MESSAGE_UPDATE", message)
+
+    def _get_messages(self, user_id, channel_id, params, **kwargs):
+        self._channel(channel_id)
+        in_channel = [m for m in self.messages.values() if m["channel_id"] == str(channel_id)]
+        limit = int(params.get("limit", 50))
+        return copy.deepcopy(list(reversed(in_channel))[:limit])
+
+    def _get_message(self, user_id, channel_id, message_id, **kwargs):
+        return copy.deepcopy(self._stored_message(channel_id, message_id))
+
+    def _edit_message(self, user_id, channel_id, message_id, payload, **kwargs):
+        message = self._stored_message(channel_id, message_id)
+        if "content" in payload:
+            message["content"] = payload["content"] or ""
+        if "embed" in payload:
+            message["embeds"] = [payload["embed"]] if payload["embed"] else []
+        message["edited_timestamp"] = self._now()
+        self.emit("MESSAGE_UPDATE", message)
+        return copy.deepcopy(message)
+
+    def _delete_message(self, user_id, channel_id, message_id, **kwargs):
+        self._stored_message(channel_id, message_id)
+        del self.messages[message_id]
+        self.emit(
+            "MESSAGE_DELETE",
+            {"id": str(message_id), "channel_id": str(channel_id), "guild_id": str(self.guild_id)},
+        )
+
+    def _reaction_event(self, user_id, channel_id, message_id, emoji):
+        self._stored_message(channel_id, message_id)
+        return {
+            "user_id": str(user_id),
+            "channel_id": str(channel_id),
+            "message_id": str(message_id),
+            "guild_id": str(self.guild_id),
+            "member": self._member(user_id),
+            "emoji": {"id": None, "name": emoji},
+        }
+
+    def _add_reaction(self, user_id, channel_id, message_id, emoji, **kwargs):
+        self.emit("MESSAGE_REACTION_ADD", self._reaction_event(user_id, channel_id, message_id, emoji))
+
+    def _remove_reaction(self, user_id, channel_id, message_id, emoji, **kwargs):
+        self.emit("MESSAGE_REACTION_REMOVE", self._reaction_event(user_id, channel_id, message_id, emoji))
+
+    def _typing(self, user_id, channel_id, **kwargs):
+        self._channel(channel_id)
+        self.emit(
+            "TYPING_START",
+            {
+                "user_id": str(user_id),
+                "channel_id": str(channel_id),
+                "guild_id": str(self.guild_id),
+                "member": self._member(user_id),
+                "timestamp": int(time.time()),
+            },
+        )
+
+    def _get_channel(self, user_id, channel_id, **kwargs):
+        return copy.deepcopy(self._channel(channel_id))
+
+    def _get_channels(self, user_id, guild_id, **kwargs):
+        return copy.deepcopy(list(self.channels.values()))
+
+    def _create_channel(self, user_id, guild_id, payload, **kwargs):
+        if payload.get("type", 0) != discord.ChannelType.text.value:
+            raise NotImplementedError("The offline backend only supports text channels")
+        channel_id = self.add_text_channel(payload["name"])
+        self.emit("CHANNEL_CREATE", self.channels[channel_id])
+        return copy.deepcopy(self.channels[channel_id])
+
+    def _delete_channel(self, user_id, channel_id, **kwargs):
+        data = self.channels.pop(channel_id, None) or self._channel(channel_id)
+        self.emit("CHANNEL_DELETE", data)
+        return copy.deepcopy(data)
+
+
+class _FakeResponse:
+    """ Just enough of an ``aiohttp.ClientResponse`` to build :py:class:`discord.HTTPException` objects with """
+
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Offline"
@@ -0,0 +1,70 @@
+"""
+A cache of compiled regular expressions, shared by the regex assertions for the whole run.
+
+The ``re`` module only keeps a few hundred compiled patterns, and once a suite uses more distinct patterns than that,
+it starts compiling them over and over again. :py:data:`pattern_cache` is a bounded LRU cache that keeps as many as
+it is told to, and counts its hits and misses so the run stats can show how well it is doing. Assertions also accept
+patterns that were already compiled with :py:func:`re.compile`, which skip the cache entirely.
+"""
+
+import re
+from collections import OrderedDict
+
+Pattern = type(re.compile(""))
+
+
+class PatternCache:
+    """ A least-recently-used cache of compiled patterns.
+
+    :param int maxsize: The most patterns to keep compiled
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._patterns = OrderedDict()
+
+    def compile(self, pattern, flags=0):
+        """ Get ``pattern`` compiled, from the cache if it's there.
+
+        :param pattern: The regular expression, or a compiled pattern which is returned as it is
+        :type pattern: Union[str, re.Pattern]
+        :param int flags: Flags for :py:func:`re.compile`
+        :rtype: re.Pattern
+        """
+        if isinstance(pattern, Pattern):
+            return pattern
+        key = (pattern, flags)
+        compiled = self._patterns.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._patterns.move_to_end(key)
+            return compiled
+        self.misses += 1
+        compiled = self._patterns[key] = re.compile(pattern, flags)
+        if len(self._patterns) > self.maxsize:
+            self._patterns.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        """ Forget every pattern and reset the counters """
+        self._patterns.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def format(self):
+        """ A one line summary of the counters for the stats display, empty if the cache was never used.
+
+        :rtype: str
+        """
+        lookups = self.hits + self.misses
+        if not lookups:
+            return ""
+        return "regex cache: {} hits, {} misses ({:.0%} hit rate), {}/{} patterns\n".format(
+            self.hits, self.misses, self.hits / lookups, len(self._patterns), self.maxsize
+        )
+
+
+#: The cache used by every regex assertion
+pattern_cache = PatternCache()
@@ -0,0 +1,176 @@
+"""
+Profiling a test run, to find out where the tester's CPU time goes.
+
+:py:class:`RunProfiler` runs a sampling profiler in a background thread. Every few milliseconds it looks at the stack
+of the thread running the event loop, and charges the sample to the test whose function is on that stack, or to
+``<loop>`` for everything that runs outside of any test, like discord.py parsing gateway events. Samples where the
+loop is just waiting for I/O are only counted, as ``idle``. This works when tests run in parallel, which a per-test
+:py:mod:`cProfile` can't, as there is only ever one active profiler per thread.
+
+It also keeps the event loop lag that the bot's :py:class:`HealthMonitor <distest.health.HealthMonitor>` measures
+(how late a short sleep wakes up, which is how long the loop was kept busy by something that didn't yield), and
+charges it to the tests that were running.
+
+:py:meth:`RunProfiler.write` saves the results to a directory:
+
+* ``test-<test>.folded``: the collapsed stacks of each test (and ``test-_loop_.folded`` for ``<loop>``), one
+  ``frame;frame;frame count`` line per distinct stack, the format flamegraph.pl, speedscope and inferno read.
+* ``run.folded``: every sample of the run, with the test (or ``<loop>``) as the root frame.
+* ``lag.json``: loop lag percentiles for the whole run and for each test, in milliseconds.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+from .timing import percentile
+
+#: Functions the event loop sits in while it has nothing to do
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "kqueue", "_poll", "wait"}
+
+
+def _label(code):
+    """ A short name for a frame: the function name and the last two parts of its file's path """
+    path = code.co_filename.replace("\\", "/").split("/")
+    return "{}:{}".format("/".join(path[-2:]), code.co_name)
+
+
+def _file_name(owner):
+    """ The file the stacks of a test go in, prefixed so no test name can clash with ``run.folded`` """
+    return "test-{}.folded".format(re.sub(r"[^\w.-]", "_", owner))
+
+
+class RunProfiler:
+    """ Samples the stack of the event loop thread and measures loop lag, per test.
+
+    :param str directory: Where :py:meth:`write` puts the results, created if it doesn't exist
+    :param float interval: Seconds between stack samples
+    """
+
+    def __init__(self, directory, interval=0.005):
+        self.directory = directory
+        self.interval = interval
+        self.stacks = {}
+        self.idle = 0
+        self.lag = []
+        self.test_lag = {}
+        self._owners = {}
+        self._running = set()
+        self._thread = None
+        self._thread_id = None
+        self._stopping = threading.Event()
+        self._health = None
+
+    def start(self, health=None):
+        """ Start sampling the thread this is called from, which must be running the event loop. Does nothing if
+        already started.
+
+        :param HealthMonitor health: The monitor to take the loop lag from, if any. It has to be started separately.
+        """
+        if self._thread is not None:
+            return
+        self._thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._sample, name="distest-profiler", daemon=True)
+        self._thread.start()
+        if health is not None:
+            self._health = health
+            health.listeners.append(self._record_lag)
+
+    def stop(self):
+        """ Stop sampling and taking loop lag """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        if self._health is not None:
+            self._health.listeners.remove(self._record_lag)
+
+    def test_started(self, test):
+        """ Start charging samples that have ``test``'s function on the stack to it.
+
+        :param Test test: The test that is starting
+        """
+        self.start()
+        self._owners[getattr(test.func, "__code__", None)] = test.name
+        self._running.add(test.name)
+
+    def test_finished(self, test):
+        """ Stop charging loop lag to ``test``.
+
+        :param Test test: The test that just finished
+        """
+        self._running.discard(test.name)
+
+    def _sample(self):
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            if frame.f_code.co_name in IDLE_FUNCTIONS and frame.f_back is not None:
+                self.idle += 1
+                continue
+            owner = None
+            stack = []
+            while frame is not None:
+                if owner is None:
+                    owner = self._owners.get(frame.f_code)
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks.setdefault(owner or "<loop>", Counter())[";".join(stack)] += 1
+
+    def _record_lag(self, lag):
+        self.lag.append(lag)
+        for name in self._running:
+            self.test_lag.setdefault(name, []).append(lag)
+
+    @staticmethod
+    def _lag_summary(values):
+        if not values:
+            return None
+        return {
+            "samples": len(values),
+            "max": max(values) * 1000,
+            **{"p{}".format(pct): percentile(values, pct) * 1000 for pct in (50, 90, 99)},
+        }
+
+    def write(self):
+        """ Write the collapsed stacks and the loop lag summary to :py:attr:`directory` """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "run.folded"), "w", encoding="utf-8") as run:
+            for owner, stacks in sorted(self.stacks.items()):
+                with open(os.path.join(self.directory, _file_name(owner)), "w", encoding="utf-8") as file:
+                    for stack, count in stacks.most_common():
+                        file.write("{} {}\n".format(stack, count))
+                        run.write("{};{} {}\n".format(owner, stack, count))
+        with open(os.path.join(self.directory, "lag.json"), "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "interval": self._health.interval * 1000 if self._health is not None else None,
+                    "idle_samples": self.idle,
+                    "run": self._lag_summary(self.lag),
+                    "tests": {name: self._lag_summary(values) for name, values in sorted(self.test_lag.items())},
+                },
+                file,
+                indent=2,
+            )
+
+    def format(self):
+        """ A short summary for the console: the busiest tests by samples, and the worst loop lag.
+
+        :rtype: str
+        """
+        busy = sorted(((sum(stacks.values()), owner) for owner, stacks in self.stacks.items()), reverse=True)
+        lines = ["profile: {} busy samples, {} idle, written to {}".format(
+            sum(count for count, _ in busy), self.idle, self.directory
+        )]
+        lines += ["  {:>6} {}".format(count, owner) for count, owner in busy[:5]]
+        summary = self._lag_summary(self.lag)
+        if summary is not None:
+            lines.append("loop lag: p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {max:.1f} ms".format(**summary))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,88 @@
+"""
+Proactive rate limiting of the messages tests send.
+
+Discord allows a bot to send about 5 messages every 5 seconds in each channel, and 50 requests a second overall.
+discord.py only reacts to going over, by sleeping for a few seconds after a 429 response, and that stall lands in the
+middle of whatever assertion was sending. :py:class:`SendScheduler` keeps a sliding window of recent sends for each
+channel and holds trigger messages back until they fit, in the order they were queued. The time spent held back is
+recorded on the assertion's :py:class:`AssertionTiming <distest.timing.AssertionTiming>` as ``throttled`` and left out
+of its latency and duration, and out of the test's duration.
+
+When running in parallel, tests are also handed the free channel that can send the soonest, so sends are spread over
+the channel pool.
+"""
+
+import asyncio
+from collections import deque
+
+
+class SendScheduler:
+    """ Queues sends so they stay inside the per-channel and global rate limits.
+
+    :param int rate: How many messages can be sent in a channel every ``per`` seconds
+    :param float per: The length of the per-channel window, in seconds
+    :param int global_rate: How many messages can be sent overall every ``global_per`` seconds
+    :param float global_per: The length of the global window, in seconds
+    """
+
+    def __init__(self, rate=5, per=5.0, global_rate=50, global_per=1.0):
+        self.rate = rate
+        self.per = per
+        self.global_rate = global_rate
+        self.global_per = global_per
+        self._channels = {}
+        self._locks = {}
+        self._global = deque()
+
+    @staticmethod
+    def _window_delay(window, rate, per, now):
+        """ Forget the sends that have left ``window``, and return how long until another one fits in it """
+        while window and window[0] <= now - per:
+            window.popleft()
+        if len(window) < rate:
+            return 0.0
+        return window[0] + per - now
+
+    def delay(self, channel_id):
+        """ How long a message sent in the channel now would be held back for, ignoring anything already queued.
+
+        :param int channel_id: The ID of the channel
+        :return: The delay, in seconds
+        :rtype: float
+        """
+        now = asyncio.get_event_loop().time()
+        return max(
+            self._window_delay(self._channels.setdefault(channel_id, deque()), self.rate, self.per, now),
+            self._window_delay(self._global, self.global_rate, self.global_per, now),
+        )
+
+    async def acquire(self, channel_id):
+        """ Wait until a message can be sent in the channel, and count it as sent. Sends to the same channel are let
+        through in the order they called this.
+
+        :param int channel_id: The ID of the channel the message will be sent in
+        :return: How long the message was held back for, in seconds
+        :rtype: float
+        """
+        loop = asyncio.get_event_loop()
+        queued = loop.time()
+        lock = self._locks.get(channel_id)
+        if lock is None:
+            lock = self._locks[channel_id] = asyncio.Lock()
+        async with lock:
+            delay = self.delay(channel_id)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.delay(channel_id)
+            now = loop.time()
+            self._channels[channel_id].append(now)
+            self._global.append(now)
+        return now - queued
+
+    def pick_channel(self, channels):
+        """ Pick the channel out of ``channels`` that a message could be sent in the soonest.
+
+        :param list[discord.abc.Messageable] channels: The channels to choose from, in order of preference
+        :rtype: discord.abc.Messageable
+        """
+        return min(channels, key=lambda channel: self.delay(channel.id))
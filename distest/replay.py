@@ -0,0 +1,223 @@
+"""
+Recording a test run and replaying it later, with no Discord (or target bot) involved.
+
+:py:class:`Recorder` captures everything the tester bot sees during a run: every gateway event it receives and every
+HTTP request it makes along with Discord's response. The log is a file of JSON lines, gzipped if the path ends in
+``.gz``.
+
+:py:class:`ReplayDiscord` feeds a log back to a tester. It answers each HTTP request with the recorded response, and
+then delivers the gateway events that were recorded after that request, straight away. The target's replies arrive
+as fast as the tester can process them, so a whole suite reruns at CPU speed. This makes changes to assertion logic
+quick to check, and lets a flaky failure from a recorded session be looked at again and again.
+
+The tests being replayed have to make the same requests as the recorded run, requests are matched to the log by
+method and URL, in order. Anything that can't be matched raises a :py:exc:`ReplayMismatchError
+<distest.exceptions.ReplayMismatchError>`.
+"""
+
+import asyncio
+import copy
+import gzip
+import json
+
+import discord
+from discord.http import Route
+
+from .exceptions import ReplayMismatchError
+from .offline import FakeHTTPClient, deliver_event, _FakeResponse
+
+#: Gateway events that build the client's cache on connect, rather than being replayed after a request
+STATE_EVENTS = ("READY", "GUILD_CREATE", "GUILD_MEMBERS_CHUNK")
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Recorder:
+    """ Records the gateway events and HTTP traffic of a client, and writes them to ``path`` on :py:meth:`save`.
+
+    :py:class:`DiscordBot <distest.bot.DiscordBot>` hands gateway events to its ``recorder`` attribute, so recording a
+    tester just needs :py:meth:`install` to be called on it before it connects.
+
+    :param str path: The file to write the log to, gzipped if it ends in ``.gz``
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+
+    def meta(self, **info):
+        """ Record information about the run, like the channel it was run in, for the replay to use.
+
+        :param info: Any JSON serializable values
+        """
+        self.entries.append({"kind": "meta", **info})
+
+    def gateway(self, message):
+        """ Record a raw gateway message, as dispatched in ``socket_response``. Only dispatched events are kept.
+
+        :param dict message: The gateway message
+        """
+        if message.get("op") == 0:
+            self.entries.append({"kind": "event", "t": message["t"], "d": copy.deepcopy(message["d"])})
+
+    def install(self, client):
+        """ Start recording ``client``: sets it as the client's ``recorder`` and wraps its HTTP client.
+
+        :param DiscordBot client: The client to record
+        """
+        client.recorder = self
+        request = client.http.request
+
+        async def recorded_request(route, **kwargs):
+            # The entry goes in the log when the request is made, so events that arrive while it is in flight are
+            # replayed after its response, which is when the tester would be able to react to them.
+            entry = {"kind": "http", "method": route.method, "url": route.url[len(Route.BASE):]}
+            self.entries.append(entry)
+            try:
+                response = await request(route, **kwargs)
+            except discord.HTTPException as error:
+                entry["error"] = {"status": error.status, "text": error.text}
+                raise
+            entry["response"] = copy.deepcopy(response)
+            return response
+
+        client.http.request = recorded_request
+
+    def save(self):
+        """ Write the log to :py:attr:`path` """
+        with _open(self.path, "w") as file:
+            for entry in self.entries:
+                file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+class ReplayDiscord:
+    """ Replays a log made by :py:class:`Recorder` to a single client, see the module documentation.
+
+    Has the same :py:meth:`attach` and :py:meth:`run` interface as :py:class:`FakeDiscord
+    <distest.offline.FakeDiscord>`.
+
+    :param str path: The log to replay
+    """
+
+    def __init__(self, path):
+        with _open(path, "r") as file:
+            self.entries = [json.loads(line) for line in file if line.strip()]
+        self.meta = {}
+        for entry in self.entries:
+            if entry["kind"] == "meta":
+                self.meta.update(entry)
+
+        ready = next(
+            (i for i, entry in enumerate(self.entries) if entry["kind"] == "event" and entry["t"] == "READY"), None
+        )
+        if ready is None:
+            raise ReplayMismatchError("{} has no READY event in it, was it recorded from the start?".format(path))
+        self._ready = ready
+        self._consumed = set()
+        self._client = None
+        self._closed_event = None
+        self.users = {}
+
+    def attach(self, client, name=None, user_id=None):
+        """ Attach the client that will be replayed to, swapping out its HTTP client.
+
+        :param discord.Client client: The client to replay to
+        :return: The ID of the recorded user
+        :rtype: int
+        """
+        user = self.entries[self._ready]["d"]["user"]
+        user_id = int(user["id"])
+        self.users[user_id] = user
+        http = FakeHTTPClient(self, user_id, loop=client.loop)
+        client.http = http
+        client._connection.http = http
+        self._client = client
+        return user_id
+
+    def _events_after(self, index):
+        """ The indexes of the events recorded after entry ``index``, up to the next HTTP request """
+        events = []
+        for i in range(index + 1, len(self.entries)):
+            entry = self.entries[i]
+            if entry["kind"] == "http":
+                break
+            if entry["kind"] == "event" and i not in self._consumed:
+                events.append(i)
+        return events
+
+    def _emit(self, indexes):
+        for i in indexes:
+            self._consumed.add(i)
+            entry = self.entries[i]
+            if entry["t"] in self._client._connection.parsers:
+                self._client.loop.call_soon(deliver_event, self._client, entry["t"], copy.deepcopy(entry["d"]))
+
+    def _connect(self):
+        client = self._client
+        state = client._connection
+        state.clear()
+        state.user = discord.ClientUser(state=state, data=self.entries[self._ready]["d"]["user"])
+        state._users[state.user.id] = state.user
+        for i, entry in enumerate(self.entries):
+            if entry["kind"] != "event" or entry["t"] not in STATE_EVENTS:
+                continue
+            self._consumed.add(i)
+            if entry["t"] == "GUILD_CREATE":
+                state._add_guild_from_data(copy.deepcopy(entry["d"]))
+            elif entry["t"] == "GUILD_MEMBERS_CHUNK":
+                state.parsers["GUILD_MEMBERS_CHUNK"](copy.deepcopy(entry["d"]))
+        # Everything between READY and the first request made after it happened before the tests started
+        self._emit(self._events_after(self._ready))
+
+        self._closed_event = asyncio.Event()
+        client._closed = False
+        state.dispatch("connect")
+        state.call_handlers("ready")
+        state.dispatch("ready")
+
+    def _closed(self, user_id):
+        self._closed_event.set()
+
+    async def start(self, client):
+        """ Connect ``client`` and replay to it until it closes.
+
+        :param discord.Client client: The attached client
+        """
+        self._connect()
+        await self._closed_event.wait()
+
+    def run(self, client):
+        """ Blocking version of :py:meth:`start`.
+
+        :param discord.Client client: The attached client
+        """
+        client.loop.run_until_complete(self.start(client))
+
+    async def handle(self, user_id, route, **kwargs):
+        """ Answer a request with the first unused recorded request that has the same method and URL, then deliver
+        the events that followed it.
+
+        :raises: ReplayMismatchError if there is no such request in the log
+        """
+        url = route.url[len(Route.BASE):]
+        for i in range(self._ready, len(self.entries)):
+            entry = self.entries[i]
+            if entry["kind"] != "http" or i in self._consumed:
+                continue
+            if entry["method"] == route.method and entry["url"] == url:
+                break
+        else:
+            raise ReplayMismatchError("The recording has no more {} {} requests".format(route.method, url))
+
+        self._consumed.add(i)
+        self._emit(self._events_after(i))
+        if "error" in entry:
+            error_type = {403: discord.Forbidden, 404: discord.NotFound}.get(entry["error"]["status"])
+            raise (error_type or discord.HTTPException)(
+                _FakeResponse(entry["error"]["status"]), entry["error"]["text"]
+            )
+        return copy.deepcopy(entry.get("response"))
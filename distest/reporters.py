@@ -0,0 +1,122 @@
+"""
+Machine-readable exports of test results, for CI systems and other tooling.
+
+Reporters are given each :py:class:`Test <distest.TestInterface.Test>` as soon as it finishes, and write it straight
+to disk, so nothing is buffered in memory and a run that is cut short still leaves usable output behind.
+
+* :py:class:`JsonLinesReporter` writes one JSON object per test.
+* :py:class:`JUnitXmlReporter` writes a JUnit XML ``<testsuite>`` that most CI systems can display. The closing tag is
+  re-written after every test, so the file is valid XML at all times.
+"""
+
+import json
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+
+def test_record(test):
+    """ Build the dict that describes a finished test, used by all the reporters.
+
+    :param Test test: The test that just finished
+    :rtype: dict
+    """
+    error = None
+    if test.error is not None:
+        error = {"type": type(test.error).__name__, "message": str(test.error)}
+        health = getattr(test.error, "health", None)
+        if health is not None:
+            error["health"] = health.to_dict()
+    return {
+        "name": test.name,
+        "result": test.result.name.lower(),
+        "started": test.last_run,
+        "duration": test.duration,
+        "needs_human": test.needs_human,
+        "tags": sorted(test.tags),
+        "error": error,
+        "timings": [timing.to_dict() for timing in test.timings],
+    }
+
+
+class JsonLinesReporter:
+    """ Write every finished test to ``path`` as a line of JSON, see :py:func:`test_record` for the fields.
+
+    :param str path: The file to write to, overwritten if it exists
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def test_finished(self, test):
+        """ Write ``test`` to the file and flush it.
+
+        :param Test test: The test that just finished
+        """
+        self._file.write(json.dumps(test_record(test)) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """ Close the file """
+        self._file.close()
+
+
+class JUnitXmlReporter:
+    """ Write every finished test to ``path`` as a JUnit XML ``<testcase>``.
+
+    :param str path: The file to write to, overwritten if it exists
+    :param str suite_name: The name of the ``<testsuite>``, and the ``classname`` of each test case
+    """
+
+    FOOTER = "</testsuite>\n"
+
+    def __init__(self, path, suite_name="distest"):
+        self.suite_name = suite_name
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        self._file.write(
+            "<testsuite name={} timestamp={}>\n".format(
+                quoteattr(suite_name), quoteattr(time.strftime("%Y-%m-%dT%H:%M:%S"))
+            )
+        )
+        self._end_of_cases = self._file.tell()
+        self._write_footer()
+
+    def _write_footer(self):
+        self._file.write(self.FOOTER)
+        self._file.truncate()
+        self._file.flush()
+
+    def test_finished(self, test):
+        """ Write ``test`` to the file as a ``<testcase>``, then put the closing tag back after it.
+
+        :param Test test: The test that just finished
+        """
+        record = test_record(test)
+        case = "  <testcase name={} classname={} time={}".format(
+            quoteattr(record["name"]),
+            quoteattr(self.suite_name),
+            quoteattr("{:.3f}".format(record["duration"] or 0)),
+        )
+        if record["result"] == "skipped":
+            case += ">\n    <skipped message={}/>\n  </testcase>\n".format(quoteattr(record["error"]["message"]))
+        elif record["error"] is not None:
+            # JUnit tells failed assertions apart from tests that crashed
+            tag = "error" if record["result"] == "error" else "failure"
+            case += ">\n    <{0} type={1} message={2}>{3}</{0}>\n  </testcase>\n".format(
+                tag,
+                quoteattr(record["error"]["type"]),
+                quoteattr(record["error"]["message"]),
+                escape(json.dumps(record["timings"])),
+            )
+        elif record["result"] == "failed":
+            case += ">\n    <failure/>\n  </testcase>\n"
+        else:
+            case += "/>\n"
+        self._file.seek(self._end_of_cases)
+        self._file.write(case)
+        self._end_of_cases = self._file.tell()
+        self._write_footer()
+
+    def close(self):
+        """ Close the file """
+        self._file.close()
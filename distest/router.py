@@ -0,0 +1,323 @@
+"""
+Routes incoming discord events to the distest calls that are waiting on them.
+
+:py:meth:`discord.Client.wait_for` runs the ``check`` of every pending listener for every event of that type, which
+gets expensive once lots of tests are waiting at the same time in a busy guild. The :py:class:`EventRouter` instead
+indexes waiters by the event type and by the channel, author and message IDs they care about, so an event is only
+handed to the waiters whose keys match it. The ``check`` function is still supported, but only runs on waiters that
+already matched on their keys.
+
+The router also keeps a bounded buffer of the recent events in each channel, numbered in the order they arrived. A
+target that replies faster than a test can start waiting still gets caught: :py:meth:`EventRouter.wait_for_next`
+looks in the buffer for a matching event newer than a given sequence number before waiting on the live stream.
+"""
+
+import asyncio
+from collections import deque
+from itertools import product
+
+
+def _message_keys(message):
+    return message.channel.id, message.author.id, message.id
+
+
+def _message_edit_keys(before, after):
+    return _message_keys(after)
+
+
+def _reaction_keys(reaction, user):
+    return reaction.message.channel.id, user.id, reaction.message.id
+
+
+def _typing_keys(channel, user, when):
+    return channel.id, user.id, None
+
+
+def _channel_keys(channel):
+    return channel.id, None, None
+
+
+def _channel_update_keys(before, after):
+    return _channel_keys(after)
+
+
+#: Functions that pull the ``(channel id, author id, message id)`` index keys out of an event's arguments. Events not
+#: listed here can only be matched by waiters that don't ask for any keys.
+KEY_EXTRACTORS = {
+    "message": _message_keys,
+    "message_edit": _message_edit_keys,
+    "message_delete": _message_keys,
+    "reaction_add": _reaction_keys,
+    "reaction_remove": _reaction_keys,
+    "typing": _typing_keys,
+    "guild_channel_create": _channel_keys,
+    "guild_channel_delete": _channel_keys,
+    "guild_channel_update": _channel_update_keys,
+}
+
+_NO_KEYS = (None, None, None)
+
+
+def _result(args):
+    """ What a wait returns for an event with these arguments """
+    if len(args) == 0:
+        return None
+    if len(args) == 1:
+        return args[0]
+    return args
+
+
+class _Waiter:
+    """ A single pending call to :py:meth:`EventRouter.wait_for` """
+
+    __slots__ = ("future", "check", "with_seq")
+
+    def __init__(self, future, check, with_seq=False):
+        self.future = future
+        self.check = check
+        self.with_seq = with_seq
+
+    def done(self):
+        return self.future.done()
+
+    def deliver(self, event, result, seq=None):
+        """ Resolve the wait with ``result``, returns True because a waiter only ever wants one event """
+        self.future.set_result((seq, result) if self.with_seq else result)
+        return True
+
+    def fail(self, exc):
+        self.future.set_exception(exc)
+
+
+class Subscription:
+    """ A standing interest in one or more events, made with :py:meth:`EventRouter.subscribe`.
+
+    Unlike :py:meth:`EventRouter.wait_for`, nothing is missed between two calls to :py:meth:`get`: every matching event
+    is queued from the moment the subscription is made until it is closed. Can be used as a context manager, which
+    closes it on exit.
+    """
+
+    def __init__(self, router, events, key, check):
+        self._router = router
+        self._events = events
+        self._key = key
+        self._queue = asyncio.Queue()
+        self._closed = False
+        self.check = check
+
+    def done(self):
+        return self._closed
+
+    def deliver(self, event, result, seq=None):
+        """ Queue up ``result``, returns False because the subscription keeps listening """
+        self._queue.put_nowait((event, result, seq))
+        return False
+
+    def fail(self, exc):
+        self._queue.put_nowait((None, exc, None))
+
+    async def get(self, timeout=None):
+        """ Get the next matching event, waiting up to ``timeout`` seconds for one if none are queued.
+
+        :param float timeout: How many seconds to wait before raising :py:exc:`asyncio.TimeoutError`
+        :return: The name of the event, its parameters, as :py:meth:`EventRouter.wait_for` would return them, and its
+                 sequence number in the router's buffer, ``None`` if it wasn't buffered
+        :rtype: tuple[str, Any, Optional[int]]
+        """
+        event, result, seq = await asyncio.wait_for(self._queue.get(), timeout)
+        if event is None:
+            raise result
+        return event, result, seq
+
+    def close(self):
+        """ Stop listening for events, anything already queued can still be read with :py:meth:`get` """
+        if not self._closed:
+            self._closed = True
+            for event in self._events:
+                self._router._remove(event, self._key, self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class EventRouter:
+    """ Keeps track of everything distest is waiting on and hands events out to the matching waiters.
+
+    Installed on :py:class:`DiscordBot <distest.bot.DiscordBot>` as ``router``, which feeds it every event it
+    dispatches.
+
+    :param int buffer_size: How many of the most recent events to keep for each channel
+    """
+
+    def __init__(self, buffer_size=100):
+        self._waiters = {}
+        self._buffers = {}
+        self.buffer_size = buffer_size
+        #: The sequence number of the last event that was buffered, see :py:meth:`wait_for_next`
+        self.seq = 0
+
+    def _keys_for(self, event, args):
+        """ Work out the index keys of an event, falling back to no keys if the arguments aren't what we expect """
+        extractor = KEY_EXTRACTORS.get(event)
+        if extractor is None:
+            return _NO_KEYS
+        try:
+            return extractor(*args)
+        except (AttributeError, TypeError):
+            return _NO_KEYS
+
+    def dispatch(self, event, *args):
+        """ Buffer an event if it happened in a channel, then hand it to every waiter whose keys match it and whose
+        ``check`` (if any) passes.
+
+        :param str event: The name of the event, without the ``on_``
+        :param args: The arguments of the event, as passed to :py:meth:`discord.Client.dispatch`
+        """
+        keys = self._keys_for(event, args)
+        seq = None
+        if keys[0] is not None:
+            self.seq = seq = self.seq + 1
+            buffer = self._buffers.get(keys[0])
+            if buffer is None:
+                buffer = self._buffers[keys[0]] = deque(maxlen=self.buffer_size)
+            buffer.append((seq, event, keys, args))
+
+        by_key = self._waiters.get(event)
+        if not by_key:
+            return
+
+        # Every combination of "this exact ID" or "any ID" for each of the three keys, at most 8 lookups
+        candidates = set(product(*(((key, None) if key is not None else (None,)) for key in keys)))
+        result = _result(args)
+
+        for candidate in candidates:
+            waiters = by_key.get(candidate)
+            if not waiters:
+                continue
+            for waiter in list(waiters):
+                if waiter.done():
+                    waiters.remove(waiter)
+                    continue
+                try:
+                    if waiter.check is not None and not waiter.check(*args):
+                        continue
+                except Exception as exc:
+                    waiter.fail(exc)
+                    waiters.remove(waiter)
+                else:
+                    if waiter.deliver(event, result, seq):
+                        waiters.remove(waiter)
+            if not waiters:
+                del by_key[candidate]
+
+    def find(self, event, since, channel_id, author_id=None, message_id=None, check=None, last=False):
+        """ Look for a buffered event in ``channel_id`` that is newer than ``since`` and matches the keys.
+
+        :param str event: The name of the event, without the ``on_``
+        :param int since: Only look at events with a higher sequence number than this
+        :param int channel_id: The channel the event happened in
+        :param int author_id: Only match events caused by this user
+        :param int message_id: Only match events about this message
+        :param Callable[...,bool] check: Extra check to run on events that match the keys
+        :param bool last: Find the newest matching event rather than the oldest
+        :return: The sequence number and parameters of the event, or ``None`` if there isn't one
+        :rtype: Optional[tuple[int, Any]]
+        """
+        buffer = self._buffers.get(channel_id, ())
+        for seq, buffered_event, keys, args in (reversed(buffer) if last else buffer):
+            if seq <= since:
+                if last:
+                    break  # Everything further back is older still
+                continue
+            if buffered_event != event:
+                continue
+            if author_id is not None and keys[1] != author_id:
+                continue
+            if message_id is not None and keys[2] != message_id:
+                continue
+            if check is not None and not check(*args):
+                continue
+            return seq, _result(args)
+        return None
+
+    def _remove(self, event, key, waiter):
+        waiters = self._waiters.get(event, {}).get(key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[event][key]
+
+    async def wait_for_next(
+        self, event, since, channel_id, author_id=None, message_id=None, check=None, timeout=None
+    ):
+        """ Like :py:meth:`wait_for`, but first returns the oldest buffered event in the channel that is newer than
+        ``since``, if there is one, so events that arrived before the wait started aren't missed.
+
+        :param str event: The name of the event, without the ``on_``
+        :param int since: The :py:attr:`seq` from before the event could have happened, e.g. before sending a trigger
+        :param int channel_id: Only match events in this channel
+        :param int author_id: Only match events caused by this user
+        :param int message_id: Only match events about this message
+        :param Callable[...,bool] check: Extra check to run on events that match the keys
+        :param float timeout: How many seconds to wait before raising :py:exc:`asyncio.TimeoutError`
+        :return: The sequence number of the event, so the next wait can start after it, and its parameters
+        :rtype: tuple[int, Any]
+        """
+        found = self.find(event, since, channel_id, author_id, message_id, check)
+        if found is not None:
+            return found
+        return await self._wait(event, (channel_id, author_id, message_id), check, timeout, with_seq=True)
+
+    async def _wait(self, event, key, check, timeout, with_seq=False):
+        future = asyncio.get_event_loop().create_future()
+        waiter = _Waiter(future, check, with_seq)
+        self._waiters.setdefault(event, {}).setdefault(key, []).append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._remove(event, key, waiter)
+
+    async def wait_for(
+        self, event, channel_id=None, author_id=None, message_id=None, check=None, timeout=None
+    ):
+        """ Wait for the next event of type ``event`` with the given keys, works like
+        :py:meth:`discord.Client.wait_for`.
+
+        Any key left as ``None`` matches anything.
+
+        :param str event: The name of the event, without the ``on_``
+        :param int channel_id: Only match events in this channel
+        :param int author_id: Only match events caused by this user
+        :param int message_id: Only match events about this message
+        :param Callable[...,bool] check: Extra check to run on events that match the keys
+        :param float timeout: How many seconds to wait before raising :py:exc:`asyncio.TimeoutError`
+        :return: The parameters of the event
+        :rtype: Any
+        """
+        return await self._wait(event, (channel_id, author_id, message_id), check, timeout)
+
+    def subscribe(self, *events, channel_id=None, author_id=None, message_id=None, check=None):
+        """ Start queueing every event of the given types that matches the keys, see :py:class:`Subscription`.
+
+        :param str events: The names of the events, without the ``on_``
+        :param int channel_id: Only match events in this channel
+        :param int author_id: Only match events caused by this user
+        :param int message_id: Only match events about this message
+        :param Callable[...,bool] check: Extra check to run on events that match the keys
+        :rtype: Subscription
+        """
+        key = (channel_id, author_id, message_id)
+        subscription = Subscription(self, events, key, check)
+        for event in events:
+            self._waiters.setdefault(event, {}).setdefault(key, []).append(subscription)
+        return subscription
+
+    def pending(self):
+        """ The number of waiters and subscriptions that are still listening.
+
+        :rtype: int
+        """
+        return sum(len(waiters) for by_key in self._waiters.values() for waiters in by_key.values())
@@ -0,0 +1,239 @@
+"""
+Splitting a suite over several tester bots, each with its own token, channel and event loop.
+
+Passing ``--shard i/N`` to :py:func:`run_dtest_bot <distest.run_dtest_bot>` makes it run only the ``i``-th of ``N``
+shards of the suite, see :py:func:`shard_tests`. Every process works out the same split on its own, so the shards
+never need to talk to each other.
+
+The coordinator launches one tester process per shard, waits for them all, then merges their results into a single
+stats table and exit code::
+
+    python -m distest.sharding example_tester.py TARGET_ID -r all --shard-channels 1 2 3 --shard-tokens A B C
+
+Anything after ``--`` is passed on to every tester process, e.g. ``-- --offline example_target:client -t 3``. The
+coordinator can write the merged results with ``--jsonl``, and read a previous results file with ``--durations`` to
+split the suite so every shard takes about as long as the others.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+
+from .TestInterface import Test, TestResult
+from .timing import AssertionTiming
+
+
+def parse_shard(value):
+    """ Parse a ``--shard`` argument of the form ``i/N``, where shards are numbered from 1 to ``N``.
+
+    :param str value: The argument
+    :return: The shard number and shard count
+    :rtype: tuple[int, int]
+    :raises: argparse.ArgumentTypeError
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("{} is not of the form i/N".format(value))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("shard {} does not exist, shards go from 1 to {}".format(index, count))
+    return index, count
+
+
+def load_durations(path):
+    """ Read the duration of every test from a results file written with ``--jsonl``. Tests that appear more than
+    once keep their last duration.
+
+    :param str path: The JSON lines results file
+    :return: The duration of each test, in seconds
+    :rtype: dict[str, float]
+    """
+    durations = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("duration") is not None:
+                    durations[record["name"]] = record["duration"]
+    return durations
+
+
+def _dependency_groups(tests):
+    """ Split ``tests`` into the groups that are connected by dependencies, as each group has to run in one shard.
+    Groups are in the order of their first test, and keep the order of the tests in them. """
+    parent = {test.name: test.name for test in tests}
+
+    def root(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for test in tests:
+        for name in test.depends_on:
+            if name in parent:
+                parent[root(name)] = root(test.name)
+    groups = {}
+    for test in tests:
+        groups.setdefault(root(test.name), []).append(test)
+    return list(groups.values())
+
+
+def shard_tests(collector, index, count, durations=None):
+    """ Pick out the tests of shard ``index`` out of ``count``.
+
+    Tests that depend on each other are kept together, and assigned as a group. Without ``durations``, groups are
+    assigned by a hash of the name of their first test, which is stable across runs and machines. With ``durations``,
+    the groups are dealt out longest first to whichever shard has the least work so far, tests with no duration
+    counting as the average one. Either way, every group with a serial test goes to shard 1, so serial tests are never
+    run at the same time as each other.
+
+    :param TestCollector collector: The whole suite
+    :param int index: The shard to pick, from 1 to ``count``
+    :param int count: How many shards the suite is split into
+    :param dict[str,float] durations: How long each test took in a previous run, see :py:func:`load_durations`
+    :return: A collector with just the tests of the shard
+    :rtype: TestCollector
+    """
+    tests = list(collector)
+    groups = _dependency_groups(tests)
+    if not durations:
+        picked = [
+            test for group in groups
+            if (0 if any(test.serial for test in group) else zlib.crc32(group[0].name.encode("utf-8")) % count)
+            == index - 1
+            for test in group
+        ]
+        return collector.subset(picked)
+
+    known = [durations[test.name] for test in tests if test.name in durations]
+    default = sum(known) / len(known) if known else 1.0
+
+    def group_duration(group):
+        return sum(durations.get(test.name, default) for test in group)
+
+    loads = [0.0] * count
+    shards = [[] for _ in range(count)]
+    for group in groups:
+        if any(test.serial for test in group):
+            shards[0].extend(group)
+            loads[0] += group_duration(group)
+    for group in sorted(
+        (group for group in groups if not any(test.serial for test in group)),
+        key=lambda group: (-group_duration(group), group[0].name),
+    ):
+        lightest = loads.index(min(loads))
+        shards[lightest].extend(group)
+        loads[lightest] += group_duration(group)
+    return collector.subset(shards[index - 1])
+
+
+def _test_from_record(record):
+    """ Rebuild enough of a :py:class:`Test <distest.TestInterface.Test>` from a results file record to show it """
+    test = Test(record["name"], None, needs_human=record.get("needs_human", False), tags=record.get("tags", ()))
+    test.result = TestResult[record["result"].upper()]
+    test.last_run = record.get("started") or 0
+    test.duration = record.get("duration")
+    test.timings = [AssertionTiming.from_dict(timing) for timing in record.get("timings", [])]
+    return test
+
+
+def coordinate(tester, target, run, channels, tokens=None, extra_args=(), durations=None, jsonl=None):
+    """ Run every shard of a suite in its own tester process and merge the results.
+
+    :param str tester: The path of the tester bot script
+    :param int target: The ID of the target bot
+    :param str run: What to run in each shard, as given to ``--run``
+    :param list[int] channels: The channel of each shard, there is one shard per channel
+    :param list[str] tokens: The tester bot token of each shard, can be left out when running offline
+    :param list[str] extra_args: More arguments to give to every tester process
+    :param str durations: A previous results file to balance the shards with, see :py:func:`shard_tests`
+    :param str jsonl: Where to write the merged results, as JSON lines
+    :return: The exit code, 1 if any test failed or any shard didn't finish cleanly, otherwise 0
+    :rtype: int
+    """
+    if tokens and len(tokens) != len(channels):
+        raise ValueError("Got {} tokens for {} shards".format(len(tokens), len(channels)))
+    count = len(channels)
+    with tempfile.TemporaryDirectory(prefix="distest-shards-") as directory:
+        processes = []
+        for index, channel in enumerate(channels, 1):
+            results = os.path.join(directory, "shard-{}.jsonl".format(index))
+            command = [sys.executable, tester, str(target)]
+            if tokens:
+                command.append(tokens[index - 1])
+            command += ["-c", str(channel), "-r", run, "--shard", "{}/{}".format(index, count), "--jsonl", results]
+            if durations is not None:
+                command += ["--shard-durations", durations]
+            command += list(extra_args)
+            processes.append((index, results, subprocess.Popen(command)))
+
+        failed = False
+        records = []
+        for index, results, process in processes:
+            if process.wait() != 0:
+                failed = True
+            if not os.path.exists(results):
+                print("Shard {} wrote no results, it exited with {}".format(index, process.returncode))
+                failed = True
+                continue
+            with open(results, encoding="utf-8") as file:
+                records += [json.loads(line) for line in file if line.strip()]
+
+    if jsonl is not None:
+        with open(jsonl, "w", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+    from .bot import format_stats  # Only imported here, as it brings in discord.py for every shard process
+
+    tests = sorted((_test_from_record(record) for record in records), key=lambda test: test.last_run)
+    print(format_stats(tests))
+    if any(test.result in (TestResult.FAILED, TestResult.ERROR) for test in tests):
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    """ The command line entry point of the coordinator, see the module documentation """
+    parser = argparse.ArgumentParser(
+        prog="python -m distest.sharding",
+        description="Runs a distest suite split over several tester bots and merges the results. "
+                    "Arguments after -- are passed to every tester.",
+    )
+    parser.add_argument("tester", help="The tester bot script.")
+    parser.add_argument("target", type=int, help="The client ID of the target bot.")
+    parser.add_argument("--run", "-r", default="all", help="What to run in every shard, as for the tester's --run.")
+    parser.add_argument(
+        "--shard-channels", type=int, nargs="+", required=True, help="One channel ID per shard.",
+    )
+    parser.add_argument(
+        "--shard-tokens", nargs="+", help="One tester bot token per shard. Not needed with --offline.",
+    )
+    parser.add_argument("--durations", help="A results file from a previous --jsonl run, to balance the shards with.")
+    parser.add_argument("--jsonl", help="Write the merged results to this file as JSON lines.")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    extra_args = []
+    if "--" in argv:
+        extra_args = argv[argv.index("--") + 1:]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+    if args.shard_tokens and len(args.shard_tokens) != len(args.shard_channels):
+        parser.error("--shard-tokens needs one token for each of the --shard-channels")
+    return coordinate(
+        args.tester,
+        args.target,
+        args.run,
+        args.shard_channels,
+        args.shard_tokens,
+        extra_args,
+        args.durations,
+        args.jsonl,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
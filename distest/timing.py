@@ -0,0 +1,189 @@
+"""
+Latency instrumentation for the assertions in :py:class:`TestInterface <distest.TestInterface.TestInterface>`.
+
+Every send and wait records an :py:class:`AssertionTiming` on the interface, with the time the trigger was sent, the
+time the first matching event arrived and the time the assertion finished. After each test they are stored on the
+:py:class:`Test <distest.TestInterface.Test>`, and :py:class:`LatencyReport` aggregates them into p50/p90/p99 per
+assertion kind for the stats display.
+"""
+
+import functools
+import time
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, pct):
+    """ Find the ``pct``-th percentile of ``values``, interpolating between the closest ranks.
+
+    :param list[float] values: The values, don't need to be sorted
+    :param float pct: The percentile, from 0 to 100
+    :rtype: float
+    """
+    if not values:
+        raise ValueError("Can't take a percentile of no values")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class AssertionTiming:
+    """ The timestamps of one send or wait done by a test. All times come from :py:func:`time.perf_counter`.
+
+    :param str kind: What was timed, e.g. ``wait_for_reply``
+    """
+
+    __slots__ = (
+        "kind", "started", "trigger_sent", "first_event", "completed", "throttled", "trigger_id", "processing"
+    )
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.trigger_sent = None
+        self.first_event = None
+        self.completed = None
+        self.throttled = 0.0
+        #: The ID of the trigger message that was sent, if any
+        self.trigger_id = None
+        #: How long the target says it took to respond to the trigger, see :py:mod:`distest.instrument`
+        self.processing = None
+
+    def mark_sent(self):
+        """ Record that the trigger message was sent """
+        self.trigger_sent = time.perf_counter()
+
+    def mark_event(self):
+        """ Record that the event being waited for arrived """
+        if self.first_event is None:
+            self.first_event = time.perf_counter()
+
+    def mark_completed(self):
+        """ Record that the assertion has finished checking the event """
+        self.completed = time.perf_counter()
+
+    @property
+    def latency(self):
+        """ Seconds from the trigger being sent (or the timing starting, if nothing was sent) to the first event,
+        not counting any time spent waiting on rate limits. ``None`` if no event ever arrived, e.g. if the wait timed
+        out.
+
+        :rtype: Optional[float]
+        """
+        if self.first_event is None:
+            return None
+        if self.trigger_sent is not None:
+            return self.first_event - self.trigger_sent
+        return self.first_event - self.started - self.throttled
+
+    @property
+    def duration(self):
+        """ Seconds from the start of the send or wait to the assertion being completed, not counting any time spent
+        waiting on rate limits, or ``None`` if it never was.
+
+        :rtype: Optional[float]
+        """
+        if self.completed is None:
+            return None
+        return self.completed - self.started - self.throttled
+
+    def to_dict(self):
+        """ The timing as a plain dict of seconds, relative to when it started.
+
+        :rtype: dict
+        """
+        return {
+            "kind": self.kind,
+            "trigger_sent": None if self.trigger_sent is None else self.trigger_sent - self.started,
+            "first_event": None if self.first_event is None else self.first_event - self.started,
+            "completed": None if self.completed is None else self.completed - self.started,
+            "throttled": self.throttled,
+            "processing": self.processing,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Rebuild a timing from :py:meth:`to_dict`, e.g. one read back from a results file. The times are relative
+        to a start of 0, so only the durations between them are meaningful.
+
+        :param dict data: The dict made by :py:meth:`to_dict`
+        :rtype: AssertionTiming
+        """
+        timing = cls(data["kind"])
+        timing.started = 0.0
+        timing.trigger_sent = data.get("trigger_sent")
+        timing.first_event = data.get("first_event")
+        timing.completed = data.get("completed")
+        timing.throttled = data.get("throttled", 0.0)
+        timing.processing = data.get("processing")
+        return timing
+
+
+def records_completion(function):
+    """ Decorator for ``TestInterface`` assertions and waits, marks every timing the call recorded as completed once it
+    returns or raises, so the timing covers checking the reply as well as waiting for it. Timings that were already
+    completed, like those of a :py:meth:`send_message <distest.TestInterface.TestInterface.send_message>` made along
+    the way, keep their own completion.
+    """
+
+    @functools.wraps(function)
+    async def wrapper(self, *args, **kwargs):
+        first = len(self.timings)
+        try:
+            return await function(self, *args, **kwargs)
+        finally:
+            for timing in self.timings[first:]:
+                if timing.completed is None:
+                    timing.mark_completed()
+
+    return wrapper
+
+
+class LatencyReport:
+    """ Latency percentiles of a set of tests, per assertion kind.
+
+    :param tests: The tests to report on, only their :py:attr:`timings` are used
+    :type tests: Iterable[Test]
+    """
+
+    def __init__(self, tests):
+        self.latencies = {}
+        for test in tests:
+            for timing in test.timings:
+                if timing.latency is not None:
+                    self.latencies.setdefault(timing.kind, []).append(timing.latency)
+
+    def summary(self):
+        """ Return ``{kind: {"count": n, "p50": s, "p90": s, "p99": s}}``, in seconds.
+
+        :rtype: dict
+        """
+        return {
+            kind: dict(
+                count=len(values),
+                **{"p{}".format(pct): percentile(values, pct) for pct in PERCENTILES}
+            )
+            for kind, values in sorted(self.latencies.items())
+        }
+
+    def format(self):
+        """ Format the summary as a table in milliseconds, ready to send in a code block. Empty if there are no
+        timings.
+
+        :rtype: str
+        """
+        summary = self.summary()
+        if not summary:
+            return ""
+        width = max(len("assertion"), max(map(len, summary)))
+        header = "assertion".rjust(width) + " count"
+        header += "".join(" {:>7}".format("p{}".format(pct)) for pct in PERCENTILES)
+        lines = [header + " (ms)"]
+        for kind, row in summary.items():
+            line = kind.rjust(width) + " {:>5}".format(row["count"])
+            for pct in PERCENTILES:
+                line += " {:>7.0f}".format(row["p{}".format(pct)] * 1000)
+            lines.append(line)
+        return "\n".join(lines) + "\n"
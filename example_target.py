@@ -111,4 +111,5 @@ async def on_message_edit(before, after):
         print("Message sent: {}".format(sent.clean_content))
 
 
-client.run(sys.argv[1])
+if __name__ == "__main__":
+    client.run(sys.argv[1])
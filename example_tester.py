@@ -40,7 +40,7 @@ async def test_reply_equals(interface):
     await interface.assert_reply_equals("Please say 'epic!'", "epic!")
 
 
-@test_collector()
+@test_collector(serial=True)
 async def test_channel_create(interface):
     await interface.send_message("Create a tc called yeet")
     created_channel = await interface.assert_guild_channel_created("yeet")
@@ -52,18 +52,38 @@ async def test_channel_create(interface):
 #     await interface.assert_guild_channel_pin_content_equals(created_channel )
 
 
-@test_collector()
+@test_collector(serial=True, depends_on=["test_channel_create"])
 async def test_channel_delete(interface):
     await interface.send_message("Delete that TC bro!")
     await interface.assert_guild_channel_deleted("yeet")
 
 
-@test_collector()
+@test_collector(tags=["silence"])
 async def test_silence(interface):
     await interface.send_message("Shhhhh...")
     await interface.ensure_silence()
 
 
+@test_collector(tags=["silence"])
+async def test_silence_quiescence(interface):
+    await interface.send_message("Shhhhh...")
+    await interface.ensure_silence(quiescence=1.5)
+
+
+@test_collector(tags=["silence"])
+async def test_silence_sentinel(interface):
+    await interface.send_message("Shhhhh...")
+    await interface.ensure_silence(sentinel="ping?", sentinel_reply="pong!")
+
+
+@test_collector(tags=["silence"])
+async def test_silence_after_sentinel(interface):
+    await interface.send_message("Shhhhh...")
+    await interface.ensure_silence(sentinel="ping?", sentinel_reply="pong!")
+    # The answer to the sentinel doesn't count as breaking the silence again
+    await interface.ensure_silence()
+
+
 @test_collector()
 async def test_reply_contains(interface):
     await interface.assert_reply_contains(
@@ -78,7 +98,7 @@ async def test_reply_matches(interface):
     )
 
 
-@test_collector()
+@test_collector(serial=True)
 async def test_ask_human(interface):
     await interface.ask_human("Click the Check!")
 
@@ -133,9 +153,49 @@ async def test_reply_on_edit(interface):
     await asyncio.sleep(1)
     await interface.edit_message(message, "Say 'Yeah, that is cool!'")
     await interface.assert_message_contains(message, "Yeah, that is cool!")
+    # Wait for the target to answer the edit, so its reply doesn't turn up in the next test
+    reply = await interface.wait_for_message()
+    await interface.assert_message_equals(reply, "Yeah, that is cool!")
 
 
 @test_collector()
+async def test_expect_reply(interface):
+    await interface.expect_reply("Post something with an image!").contains("xkcd").matches(r"https://").has_image()
+
+
+@test_collector()
+async def test_collect_replies(interface):
+    replies = interface.collect_replies(
+        "Say some stuff, but at 4 seconds, say 'yeet'", until=lambda message: message.content == "yeet", idle=5
+    )
+    async for message in replies:
+        await interface.assert_message_matches(message, r"\S")
+    await interface.assert_message_equals(message, "yeet")
+
+
+@test_collector()
+async def test_wait_after_collect_replies(interface):
+    async for message in interface.collect_replies("Say some stuff, but at 4 seconds, say 'yeet'", count=1):
+        await interface.assert_message_equals(message, "hahaha!")
+    # Carries on after the messages that were collected
+    await interface.assert_message_equals(await interface.wait_for_message(), "No!")
+    await interface.wait_for_event(
+        "message", check=lambda message: message.content == "yeet", timeout=5, channel_id=interface.channel.id
+    )
+
+
+@test_collector.fixture(scope="session")
+async def pong(interface):
+    # Only asked for once per run, no matter how many tests use it
+    return await interface.wait_for_reply("ping?")
+
+
+@test_collector()
+async def test_session_fixture(interface, pong):
+    await interface.assert_message_equals(pong, "pong!")
+
+
+@test_collector(serial=True)
 async def test_send_message_in_channel(interface):
     message = await interface.send_message("Say stuff in another channel")
     await interface.wait_for_message_in_channel(
@@ -19,13 +19,13 @@ setup(
     license="MIT",
     packages=["distest", "distest.TestInterface"],
     install_requires=["discord.py>=1.5.0,<1.8.0"],
+    python_requires=">=3.7",
     zip_safe=False,
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Intended Audience :: Developers',
         'Natural Language :: English',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',